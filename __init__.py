@@ -11,9 +11,17 @@
 # You should have received a copy of the GNU General Public License
 # along with this program. If not, see <http://www.gnu.org/licenses/>.
 
-import bpy
+try:
+    import bpy
+except ImportError:
+    # Imported outside of Blender, e.g. by a worker process that only needs the
+    # modules that do not depend on bpy
+    bpy = None
+
 import os
-from . import auto_load
+
+if bpy is not None:
+    from . import auto_load
 
 
 bl_info = {
@@ -28,7 +36,8 @@ bl_info = {
 }
 
 
-auto_load.init()
+if bpy is not None:
+    auto_load.init()
 
 
 def register():
@@ -0,0 +1,584 @@
+"""Decodes the channels of YCD animation sequences into NumPy arrays, a whole sequence
+at a time, and encodes arrays of values into channels.
+
+Only depends on NumPy, so it can run in worker processes outside of Blender.
+Quaternion arrays use (w, x, y, z) component order, same as mathutils.
+"""
+import numpy as np
+from collections import namedtuple
+from sys import float_info
+
+
+def decode_values(values, frame_ids):
+    """Value of each frame of a RawFloat/QuantizeFloat channel. Values are stored
+    already dequantized in the XML, so quantum and offset do not need applying."""
+    values = np.asarray(values, dtype=np.float64)
+    return values[frame_ids % len(values)]
+
+
+def decode_indirect_values(values, frames, frame_ids):
+    """Value of each frame of an IndirectQuantizeFloat channel, looked up through its frames buffer"""
+    values = np.asarray(values, dtype=np.float64)
+    frames = np.asarray(frames, dtype=np.int64)
+    return values[frames[frame_ids % len(frames)] % len(values)]
+
+
+def decode_static(value, frame_ids):
+    """Value of a static channel repeated for each frame"""
+    value = np.asarray(value, dtype=np.float64)
+    return np.broadcast_to(value, (len(frame_ids),) + value.shape).copy()
+
+
+def decode_cached_component(x, y, z):
+    """Component of a unit quaternion left out of the animation, from the other three"""
+    return np.sqrt(np.maximum(1.0 - (x * x + y * y + z * z), 0))
+
+
+def decode_vectors(components):
+    """Vector of each frame from the decoded channels of a sequence data item"""
+    if len(components) == 1:
+        return components[0]
+
+    return np.stack(components[:3], axis=1)
+
+
+def decode_quaternions(components, cached_index=None, cached_w_first=False):
+    """Quaternion of each frame from the decoded channels of a sequence data item.
+    cached_index is the index the cached component is inserted at, and cached_w_first
+    whether the resulting components start with w (CachedQuaternion2) instead of ending
+    with it (CachedQuaternion1)."""
+    if len(components) == 1:
+        return components[0]
+
+    components = list(components[:4])
+    if cached_index is not None:
+        cached = decode_cached_component(*components[:3])
+        components = components[:3]
+        components.insert(cached_index, cached)
+
+        if cached_w_first:
+            return np.stack(components, axis=1)
+
+    return np.stack([components[3], components[0], components[1], components[2]], axis=1)
+
+
+def quaternion_multiply(a, b):
+    """Products of arrays of (w, x, y, z) quaternions, same as a @ b for each pair"""
+    aw, ax, ay, az = np.moveaxis(np.asarray(a), -1, 0)
+    bw, bx, by, bz = np.moveaxis(np.asarray(b), -1, 0)
+
+    return np.stack((
+        aw * bw - ax * bx - ay * by - az * bz,
+        aw * bx + ax * bw + ay * bz - az * by,
+        aw * by - ax * bz + ay * bw + az * bx,
+        aw * bz + ax * by - ay * bx + az * bw,
+    ), axis=-1)
+
+
+def quaternion_conjugate(q):
+    """Conjugates of an array of (w, x, y, z) quaternions, the inverses of unit quaternions"""
+    return np.asarray(q) * np.array((1.0, -1.0, -1.0, -1.0))
+
+
+def quaternion_rotate(q, vectors):
+    """Rotate an array of vectors by unit (w, x, y, z) quaternions"""
+    q = np.asarray(q)
+    w = q[..., :1]
+    xyz = q[..., 1:]
+    t = 2 * np.cross(xyz, vectors)
+
+    return vectors + w * t + np.cross(xyz, t)
+
+
+def reduce_keyframes(values, tolerance):
+    """Frames to keep of a track with a row of values per frame, so that linear
+    interpolation between them stays within tolerance of every frame's values. Same as
+    Douglas-Peucker, splitting all segments over the tolerance at once."""
+    frame_count = len(values)
+    if np.all(np.abs(values - values[0]) <= tolerance):
+        return np.array([0])
+
+    if frame_count < 3:
+        return np.arange(frame_count)
+
+    frames = np.arange(frame_count)
+    keys = np.array([0, frame_count - 1])
+    while True:
+        # Segment each frame is in, between the keys it is interpolated from
+        segments = np.clip(np.searchsorted(keys, frames, side="right") - 1, 0, len(keys) - 2)
+        start = keys[segments]
+        end = keys[segments + 1]
+        fac = ((frames - start) / (end - start))[:, None]
+        interpolated = values[start] + (values[end] - values[start]) * fac
+        errors = np.abs(interpolated - values).max(axis=1)
+
+        # Frame with the largest error of each segment
+        order = np.lexsort((errors, segments))
+        last = np.append(segments[order][1:] != segments[order][:-1], True)
+        worst = order[last]
+        worst = worst[errors[worst] > tolerance]
+
+        if len(worst) < 1:
+            return keys
+
+        keys = np.union1d(keys, worst)
+
+
+# Plain data of a channel, as built by TrackEncoder on export or Channel.get_data on import,
+# which can be passed to worker processes
+ChannelData = namedtuple("ChannelData", ["type", "value", "values", "frames", "offset", "quantum", "quat_index"],
+                         defaults=(None,) * 6)
+
+
+def decode_channel(data, frame_ids, channel_values):
+    """Value of each of frame_ids of a channel, channel_values being the values of the
+    channels before it in its sequence data"""
+    if data.type in ("StaticQuaternion", "StaticVector3", "StaticFloat"):
+        return decode_static(data.value, frame_ids)
+
+    if data.type == "IndirectQuantizeFloat":
+        return decode_indirect_values(data.values, data.frames, frame_ids)
+
+    if data.type in ("CachedQuaternion1", "CachedQuaternion2"):
+        return decode_cached_component(*channel_values[:3])
+
+    return decode_values(data.values, frame_ids)
+
+
+def decode_channels(channels, frame_ids):
+    """Value of each channel of a sequence data for each of frame_ids, as arrays"""
+    channel_values = []
+    for data in channels:
+        channel_values.append(decode_channel(data, frame_ids, channel_values))
+
+    return channel_values
+
+
+def decode_channel_vectors(channels, frame_ids):
+    """Vector of each of frame_ids as an array with a row per frame"""
+    return decode_vectors(decode_channels(channels, frame_ids))
+
+
+def decode_channel_quaternions(channels, frame_ids):
+    """Quaternion of each of frame_ids as an array of (w, x, y, z) rows"""
+    cached_channel = None
+    if len(channels) <= 4:
+        for data in channels:
+            if data.type in ("CachedQuaternion1", "CachedQuaternion2"):
+                cached_channel = data
+
+    if cached_channel is None:
+        return decode_quaternions(decode_channels(channels, frame_ids))
+
+    return decode_quaternions(decode_channels(channels, frame_ids), cached_channel.quat_index,
+                              cached_channel.type == "CachedQuaternion2")
+
+
+def get_cached_component_index(quaternions, drop_largest=True):
+    """Index of the (x, y, z, w) component a CachedQuaternion1 channel can leave out of
+    quaternions, and a copy of them flipped so it is never negative. Returns None and
+    quaternions unchanged if flipping would leave consecutive ones in opposite hemispheres."""
+    if drop_largest:
+        # Component furthest from 0 in every frame, so it never changes sign
+        index = int(np.argmax(np.abs(quaternions).min(axis=0)))
+    else:
+        index = 3
+
+    flipped = quaternions * np.where(quaternions[:, index:index + 1] < 0, -1, 1)
+    if np.any(np.sum(flipped[1:] * flipped[:-1], axis=1) < 0):
+        return None, quaternions
+
+    return index, flipped
+
+
+def get_quantum_and_min_val(nums):
+    values = np.asarray(nums, dtype=np.float64)
+
+    min_val = min(float_info.max, values.min())
+    max_val = max(float_info.min, values.max())
+
+    # Smallest change between consecutive values, the first one counting from 0
+    deltas = np.abs(np.diff(values, prepend=0))
+    deltas = deltas[deltas != 0]
+    min_delta = deltas.min() if len(deltas) > 0 else 0
+
+    range_value = max_val - min_val
+    min_quant = range_value / 1048576
+    quantum = max(min_delta, min_quant)
+
+    return float(min_val), float(quantum)
+
+
+def encode_lossless(values, indirect_percentage=0.1):
+    """Encode values exactly, through a frames buffer if few of them are unique"""
+    values = np.asarray(values, dtype=np.float64)
+    uniq_values, frames = np.unique(values, return_inverse=True)
+
+    if len(uniq_values) == 1:
+        return ChannelData("StaticFloat", value=float(uniq_values[0]))
+
+    if len(uniq_values) / len(values) <= indirect_percentage:
+        min_value, quantum = get_quantum_and_min_val(uniq_values)
+        return ChannelData("IndirectQuantizeFloat", values=uniq_values, frames=frames.ravel(),
+                           offset=min_value, quantum=quantum)
+
+    min_value, quantum = get_quantum_and_min_val(values)
+    return ChannelData("QuantizeFloat", values=values, offset=min_value, quantum=quantum)
+
+
+def encode_values(values, tolerance, max_bits=20):
+    """Encode values with the smallest channel type whose decoded values stay within
+    tolerance of them. Values are quantized to a quantum of twice the tolerance, limited
+    to max_bits per value, and written raw if that limit keeps them from the tolerance.
+    Returns the channel and the values it decodes to."""
+    values = np.asarray(values, dtype=np.float64)
+    min_value = values.min()
+    value_range = values.max() - min_value
+
+    if value_range <= 2 * tolerance:
+        value = float(min_value + value_range / 2)
+        return ChannelData("StaticFloat", value=value), np.full(len(values), value)
+
+    quantum = max(2 * tolerance, value_range / (2 ** max_bits - 1))
+    levels = np.round((values - min_value) / quantum).astype(np.int64)
+    uniq_levels, frames = np.unique(levels, return_inverse=True)
+    decoded = min_value + levels * quantum
+
+    if np.abs(decoded - values).max() > tolerance:
+        return ChannelData("RawFloat", values=values), values
+
+    # Sizes in bits of the quantized values, and of the unique values plus an index per frame
+    value_bits = max(1, int(uniq_levels[-1]).bit_length())
+    index_bits = max(1, (len(uniq_levels) - 1).bit_length())
+    direct_size = len(values) * value_bits
+    indirect_size = len(uniq_levels) * value_bits + len(values) * index_bits
+
+    if indirect_size < direct_size:
+        return ChannelData("IndirectQuantizeFloat", values=min_value + uniq_levels * quantum,
+                           frames=frames.ravel(), offset=float(min_value), quantum=float(quantum)), decoded
+
+    return ChannelData("QuantizeFloat", values=decoded, offset=float(min_value), quantum=float(quantum)), decoded
+
+
+def get_vector_errors(vectors, decoded):
+    """Distance between each vector and its decoded value"""
+    return np.linalg.norm(np.asarray(decoded) - np.asarray(vectors), axis=-1)
+
+
+def get_quaternion_errors(quaternions, decoded):
+    """Angle between each quaternion and its decoded value, which may not be normalized"""
+    quaternions = np.asarray(quaternions)
+    decoded = np.asarray(decoded)
+    lengths = np.linalg.norm(quaternions, axis=-1) * \
+        np.linalg.norm(decoded, axis=-1)
+    dots = np.abs(np.sum(quaternions * decoded, axis=-1)) / \
+        np.where(lengths > 0, lengths, 1)
+
+    return 2 * np.arccos(np.clip(dots, 0, 1))
+
+
+class TrackEncoder:
+    """Builds the channels of animation tracks, compressing them within a maximum error if
+    one is set, and keeps count of what it chose. Location, scale and UV tracks are arrays
+    with a row per frame, rotation tracks arrays of (w, x, y, z) rows."""
+
+    def __init__(self, quaternion_mode="FULL", max_position_error=None, max_rotation_error=None):
+        self.quaternion_mode = quaternion_mode
+        self.max_position_error = max_position_error
+        self.max_rotation_error = max_rotation_error
+        self.type_counts = {}
+        self.position_error = 0.0
+        self.rotation_error = 0.0
+
+    @property
+    def is_compressed(self):
+        return self.max_position_error is not None
+
+    def merge(self, other):
+        """Add up what other encoded"""
+        for type, count in other.type_counts.items():
+            self.type_counts[type] = self.type_counts.get(type, 0) + count
+        self.position_error = max(self.position_error, other.position_error)
+        self.rotation_error = max(self.rotation_error, other.rotation_error)
+
+    def encode_components(self, components, tolerance):
+        """Channels of each column of components, and the values they decode to"""
+        if not self.is_compressed:
+            return [encode_lossless(component) for component in components.T], components
+
+        channels = []
+        decoded = []
+        for component in components.T:
+            channel, values = encode_values(component, tolerance)
+            channels.append(channel)
+            decoded.append(values)
+
+        return channels, np.stack(decoded, axis=1)
+
+    def count_types(self, channels):
+        for channel in channels:
+            self.type_counts[channel.type] = self.type_counts.get(
+                channel.type, 0) + 1
+
+    def encode_vectors(self, values):
+        tolerance = None
+        if self.is_compressed:
+            # Tolerance per component, so the distance to the original stays within the maximum
+            tolerance = self.max_position_error / np.sqrt(values.shape[1])
+
+        channels, decoded = self.encode_components(values, tolerance)
+        if self.is_compressed:
+            self.count_types(channels)
+            self.position_error = max(
+                self.position_error, get_vector_errors(values, decoded).max())
+
+        return channels
+
+    def encode_quaternions(self, values, cached_index=None):
+        """Channels of (x, y, z, w) rows, leaving out the component at cached_index if set"""
+        tolerance = None
+        if self.is_compressed:
+            # An error of e in each of the 4 components rotates the quaternion by at most 4e
+            tolerance = self.max_rotation_error / 4
+
+        if cached_index is None:
+            channels, decoded = self.encode_components(values, tolerance)
+        else:
+            channels, decoded = self.encode_components(
+                np.delete(values, cached_index, axis=1), tolerance)
+            decoded = np.insert(decoded, cached_index,
+                                decode_cached_component(*decoded.T), axis=1)
+            channels.append(ChannelData(
+                "CachedQuaternion1", quat_index=cached_index))
+
+        if not self.is_compressed:
+            return channels
+
+        errors = get_quaternion_errors(values, decoded)
+        if cached_index is not None and errors.max() > self.max_rotation_error:
+            # The rebuilt component is too far off, write all four instead
+            return self.encode_quaternions(values)
+
+        self.count_types(channels)
+        self.rotation_error = max(self.rotation_error, errors.max())
+
+        return channels
+
+    def encode_track(self, track, values):
+        """Channels of the sequence data of a track"""
+        values = np.asarray(values, dtype=np.float64)
+
+        # Location, Scale, RootMotion Position
+        if track == 0 or track == 2 or track == 5:
+            if np.all(values == values[0]):
+                return [ChannelData("StaticVector3", value=tuple(values[0]))]
+
+            return self.encode_vectors(values)
+
+        # Rotation, RootMotion Rotation
+        if track == 1 or track == 6:
+            static_value = tuple(values[0])
+            # Channels are x, y, z, w
+            values = values[:, [1, 2, 3, 0]]
+
+            cached_index = None
+            if self.quaternion_mode != "FULL":
+                values /= np.linalg.norm(values, axis=1)[:, None]
+                cached_index, values = get_cached_component_index(
+                    values, self.quaternion_mode == "DROP_LARGEST")
+
+            if np.all(values == values[0]):
+                return [ChannelData("StaticQuaternion", value=static_value)]
+
+            return self.encode_quaternions(values, cached_index)
+
+        # UV0/U or UV1/V
+        if track == 17 or track == 18:
+            if len(values) == 1:
+                return [ChannelData("StaticVector3", value=float(values[0]))]
+
+            # Main channel item which contains frame data comes after the two static ones
+            return [ChannelData("StaticFloat", value=1 if track == 17 else 0),
+                    ChannelData("StaticFloat", value=0 if track == 17 else 1)] + \
+                self.encode_vectors(values[:, None])
+
+        return []
+
+    def report(self):
+        types = ", ".join(f"{count} {type}" for type,
+                          count in sorted(self.type_counts.items()))
+        return (f"Compressed animation channels: {types or 'none'}. Max location error "
+                f"{self.position_error:.6f}, max rotation error {np.degrees(self.rotation_error):.4f}°.")
+
+
+def encode_animation(tracks, sequence_ranges, encoder):
+    """Channels of every track in each sequence of an animation. tracks are (track, values)
+    pairs with values for every frame, sequence_ranges the frames of each sequence. Returns
+    the channels of each track in each sequence, and the encoder with what it chose."""
+    sequences = [[encoder.encode_track(track, values[start:end]) for track, values in tracks]
+                 for start, end in sequence_ranges]
+
+    return sequences, encoder
+
+
+# Rest transforms of a bone that game-local animation values are relative to, as (w, x, y, z)
+# quaternions. pose_rotation_inverse is None for root bones.
+RestTransform = namedtuple(
+    "RestTransform", ["location", "rotation_inverse", "pose_rotation_inverse"])
+
+
+def locations_to_pose(locations, rest_transform):
+    return quaternion_rotate(rest_transform.rotation_inverse, locations - rest_transform.location)
+
+
+def rotations_to_pose(rotations, rest_transform):
+    if rest_transform.pose_rotation_inverse is None:
+        return rotations
+
+    return quaternion_multiply(rest_transform.pose_rotation_inverse, rotations)
+
+
+def locations_from_pose(locations, rest_transform):
+    """Game-local locations of pose locations, the inverse of locations_to_pose"""
+    return quaternion_rotate(quaternion_conjugate(rest_transform.rotation_inverse), locations) + rest_transform.location
+
+
+def rotations_from_pose(rotations, rest_transform):
+    """Game-local rotations of pose rotations, the inverse of rotations_to_pose"""
+    if rest_transform.pose_rotation_inverse is None:
+        return rotations
+
+    return quaternion_multiply(quaternion_conjugate(rest_transform.pose_rotation_inverse), rotations)
+
+
+def make_hemisphere_continuous(quaternions):
+    """Flip quaternions so the dot product of consecutive ones is never negative. Same as
+    flipping each one in turn if its dot product with the (flipped) previous one is negative."""
+    dots = np.sum(quaternions[1:] * quaternions[:-1], axis=1)
+
+    # Flips so far, counting again from each frame whose dot product is 0 as it is never flipped
+    flips = np.concatenate(([0], np.cumsum(dots < 0)))
+    restarts = np.concatenate(([0], np.where(dots == 0, np.arange(1, len(quaternions)), 0)))
+    flips -= flips[np.maximum.accumulate(restarts)]
+
+    return quaternions * np.where(flips % 2 == 1, -1, 1)[:, None]
+
+
+# Animated bones without a counterpart in the game's animations, which follow another bone
+ROLL_BONES = {"RB_L_ThighRoll": "SKEL_L_Thigh",
+              "RB_R_ThighRoll": "SKEL_R_Thigh"}
+
+
+# Channels of an animation read on the main thread. sequences hold the channels of each sequence
+# data of each sequence, tracks the (bone name, track) of each sequence data or None to skip it.
+AnimationData = namedtuple(
+    "AnimationData", ["frame_count", "sequence_frame_limit", "sequences", "tracks"])
+
+
+def get_sequence_frames(animation_data, frame_ids):
+    """Index of the sequence each of frame_ids is in, and the frame relative to its start"""
+    frame_count, sequence_frame_limit, sequences, _ = animation_data
+
+    if len(sequences) <= 1:
+        sequence_frame_limit = frame_count + 30
+
+    sequence_indices = np.minimum(
+        frame_ids // sequence_frame_limit, len(sequences) - 1)
+
+    return sequence_indices, frame_ids - sequence_indices * sequence_frame_limit
+
+
+def iter_sequence_frames(animation_data):
+    """Yields the index of each sequence of an animation with its frames, relative to its start"""
+    sequence_indices, sequence_frames = get_sequence_frames(
+        animation_data, np.arange(animation_data.frame_count))
+
+    for sequence_index in range(len(animation_data.sequences)):
+        frames = sequence_frames[sequence_indices == sequence_index]
+        if len(frames) > 0:
+            yield sequence_index, frames
+
+
+def decode_animation(animation_data, rest_transforms, keyframe_tolerance=None):
+    """Pose values of every bone track of an animation. Returns {action type: {track: {bone
+    name: (frame ids, values)}}}, values being an array with a row per kept frame, reduced
+    to keyframe_tolerance if set."""
+    _, _, sequences, tracks = animation_data
+
+    tracks_values = {}
+    for sequence_index, sequence_frames in iter_sequence_frames(animation_data):
+        for channels, bone_track in zip(sequences[sequence_index], tracks):
+            if bone_track is None:
+                continue
+
+            bone_name, track = bone_track
+            rest_transform = rest_transforms[bone_name]
+
+            if track == 0 or track == 5:
+                values = locations_to_pose(decode_channel_vectors(
+                    channels, sequence_frames), rest_transform)
+            elif track == 1:
+                values = rotations_to_pose(decode_channel_quaternions(
+                    channels, sequence_frames), rest_transform)
+            elif track == 2:
+                values = decode_channel_vectors(channels, sequence_frames)
+            elif track == 6:
+                values = decode_channel_quaternions(channels, sequence_frames)
+            else:
+                continue
+
+            tracks_values.setdefault(
+                (track, bone_name), []).append(values)
+
+    for roll_bone, bone in ROLL_BONES.items():
+        if (1, bone) in tracks_values:
+            tracks_values[(1, roll_bone)] = tracks_values[(1, bone)]
+
+    actions_data = {}
+    for (track, bone_name), values in tracks_values.items():
+        if track == 5:
+            action_type = "root_motion_location"
+        elif track == 6:
+            action_type = "root_motion_rotation"
+        else:
+            action_type = "base"
+
+        values = np.concatenate(values)
+        keys = np.arange(len(values))
+        if keyframe_tolerance is not None:
+            keys = reduce_keyframes(values, keyframe_tolerance)
+            values = values[keys]
+
+        actions_data.setdefault(action_type, {}).setdefault(
+            track, {})[bone_name] = (keys, values)
+
+    return actions_data
+
+
+def decode_uv_animation(animation_data):
+    """UV offsets of every frame of a UV animation, as {bone id: array of (u, v) rows} in game
+    space. The UV0 and UV1 tracks of a bone id are the rows of a UV transform, whose last
+    column is the offset. tracks hold the (bone id, track) of each sequence data."""
+    _, _, sequences, tracks = animation_data
+
+    tracks_values = {}
+    for sequence_index, sequence_frames in iter_sequence_frames(animation_data):
+        for channels, bone_track in zip(sequences[sequence_index], tracks):
+            if bone_track is None or bone_track[1] not in (17, 18):
+                continue
+
+            values = decode_channel_vectors(channels, sequence_frames)
+            if values.ndim > 1:
+                values = values[:, -1]
+
+            tracks_values.setdefault(bone_track, []).append(values)
+
+    frame_count = animation_data.frame_count
+    offsets = {}
+    for bone_id in sorted({bone_id for bone_id, _ in tracks_values}):
+        u = tracks_values.get((bone_id, 17))
+        v = tracks_values.get((bone_id, 18))
+        offsets[bone_id] = np.column_stack((np.concatenate(u) if u else np.zeros(frame_count),
+                                            np.concatenate(v) if v else np.zeros(frame_count)))
+
+    return offsets
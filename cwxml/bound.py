@@ -1,7 +1,7 @@
 from abc import ABC as AbstractClass, abstractmethod
-from mathutils import Vector
 from xml.etree import ElementTree as ET
 from .element import (
+    Vector,
     AttributeProperty,
     ElementTree,
     ElementProperty,
@@ -1,7 +1,7 @@
 # from .element import *
 from abc import ABC as AbstractClass, abstractmethod
-from mathutils import Vector
 from .element import (
+    Vector,
     ElementTree,
     ElementProperty,
     ListProperty,
@@ -10,9 +10,11 @@ from .element import (
     ValueProperty,
     VectorProperty
 )
+import numpy as np
 from xml.etree import ElementTree as ET
 from inspect import isclass
 from math import sqrt
+from .animcodec import ChannelData
 
 
 class YCD:
@@ -123,74 +125,60 @@ class AttributesListProperty(ItemTypeListProperty):
     tag_name = "Attributes"
 
 
-class ValuesBuffer(ElementProperty):
-    value_types = (list)
+class ArrayBuffer(ElementProperty, AbstractClass):
+    """Whitespace separated numbers, held as a NumPy array of dtype"""
+    value_types = (np.ndarray)
 
-    def __init__(self):
-        super().__init__(tag_name="Values", value=[])
+    @property
+    @abstractmethod
+    def dtype(self):
+        raise NotImplementedError
+
+    # Numbers per line when written
+    columns = 10
+
+    def __init__(self, tag_name, value=None):
+        super().__init__(tag_name, None)
+        self.value = value
+
+    @property
+    def value(self):
+        return self._value
+
+    @value.setter
+    def value(self, value):
+        self._value = np.asarray(value if value is not None else (), dtype=self.dtype)
 
     @classmethod
     def from_xml(cls, element: ET.Element):
         new = cls()
-        text = element.text.strip().split("\n")
-        if len(text) > 0:
-            for line in text:
-                items = line.strip().split(" ")
-                for item in items:
-                    new.value.append(float(item))
+        new.value = np.fromstring(element.text or "", dtype=cls.dtype, sep=" ")
 
         return new
 
     def to_xml(self):
         element = ET.Element(self.tag_name)
-        columns = 10
-        text = []
+        # Shortest representation of each number that reads back the same
+        text = self.value.astype(str)
 
-        for index, value in enumerate(self.value):
-            text.append(str(value))
-            if index < len(self.value) - 1:
-                text.append(" ")
-            if (index + 1) % columns == 0:
-                text.append("\n")
-
-        element.text = "".join(text)
+        element.text = "\n".join(" ".join(text[index:index + self.columns])
+                                 for index in range(0, len(text), self.columns))
 
         return element
 
 
-class FramesBuffer(ElementProperty):
-    value_types = (list)
+class ValuesBuffer(ArrayBuffer):
+    dtype = np.float32
 
-    def __init__(self):
-        super().__init__(tag_name="Frames", value=[])
+    def __init__(self, value=None):
+        super().__init__("Values", value)
 
-    @classmethod
-    def from_xml(cls, element: ET.Element):
-        new = cls()
-        text = element.text.strip().split("\n")
-        if len(text) > 0:
-            for line in text:
-                items = line.strip().split(" ")
-                for item in items:
-                    new.value.append(int(item))
-
-        return new
-
-    def to_xml(self):
-        element = ET.Element(self.tag_name)
-        columns = 10
-        text = []
 
-        for index, value in enumerate(self.value):
-            text.append(str(value))
-            if index < len(self.value) - 1:
-                text.append(" ")
-            if (index + 1) % columns == 0:
-                text.append("\n")
+class FramesBuffer(ArrayBuffer):
+    dtype = np.uint32
 
-        element.text = "".join(text)
-
-        return element
+    def __init__(self, value=None):
+        super().__init__("Frames", value)
 
 
 class ChannelsListProperty(ItemTypeListProperty):
@@ -209,6 +197,10 @@ class ChannelsListProperty(ItemTypeListProperty):
         def get_value(self, frame_id, channel_values):
             raise NotImplementedError
 
+        def get_data(self):
+            """Plain ChannelData of the channel, which can be decoded outside of Blender"""
+            raise NotImplementedError
+
     class StaticQuaternion(Channel):
         type = "StaticQuaternion"
 
@@ -217,6 +209,9 @@ class ChannelsListProperty(ItemTypeListProperty):
             self.value = QuaternionProperty("Value")
             self.type = "StaticQuaternion"
 
+        def get_data(self):
+            return ChannelData(self.type, value=tuple(self.value))
+
         def get_value(self, frame_id, channel_values):
             return self.value
 
@@ -228,6 +223,9 @@ class ChannelsListProperty(ItemTypeListProperty):
             self.value = VectorProperty("Value")
             self.type = "StaticVector3"
 
+        def get_data(self):
+            return ChannelData(self.type, value=tuple(self.value))
+
         def get_value(self, frame_id, channel_values):
             return self.value
 
@@ -239,6 +237,9 @@ class ChannelsListProperty(ItemTypeListProperty):
             self.value = ValueProperty("Value", 0.0)
             self.type = "StaticFloat"
 
+        def get_data(self):
+            return ChannelData(self.type, value=self.value)
+
         def get_value(self, frame_id, channel_values):
             return self.value
 
@@ -250,6 +251,9 @@ class ChannelsListProperty(ItemTypeListProperty):
             self.values = ValuesBuffer()
             self.type = "RawFloat"
 
+        def get_data(self):
+            return ChannelData(self.type, values=self.values)
+
         def get_value(self, frame_id, channel_values):
             return self.values[frame_id % len(self.values)]
 
@@ -263,6 +267,9 @@ class ChannelsListProperty(ItemTypeListProperty):
             self.values = ValuesBuffer()
             self.type = "QuantizeFloat"
 
+        def get_data(self):
+            return ChannelData(self.type, values=self.values, offset=self.offset, quantum=self.quantum)
+
         def get_value(self, frame_id, channel_values):
             return self.values[frame_id % len(self.values)]
 
@@ -274,6 +281,10 @@ class ChannelsListProperty(ItemTypeListProperty):
             self.frames = FramesBuffer()
             self.type = "IndirectQuantizeFloat"
 
+        def get_data(self):
+            return ChannelData(self.type, values=self.values, frames=self.frames,
+                               offset=self.offset, quantum=self.quantum)
+
         def get_value(self, frame_id, channel_values):
             return self.values[(self.frames[frame_id % len(self.frames)]) % len(self.values)]
 
@@ -294,6 +305,9 @@ class ChannelsListProperty(ItemTypeListProperty):
             self.quat_index = ValueProperty("QuatIndex", 0)
             self.type = "CachedQuaternion1"
 
+        def get_data(self):
+            return ChannelData(self.type, quat_index=self.quat_index)
+
         def get_value(self, frame_id, channel_values):
             vec_len = Vector(
                 (channel_values[0], channel_values[1], channel_values[2])).length
@@ -334,6 +348,9 @@ class Animation(ElementTree):
                 super().__init__()
                 self.channels = ChannelsListProperty()
 
+            def get_channels_data(self):
+                return [channel.get_data() for channel in self.channels]
+
         list_type = SequenceData
         tag_name = "SequenceData"
 
@@ -366,6 +383,17 @@ class Animation(ElementTree):
         self.sequences = Animation.SequenceListProperty()
 
 
+class CachedAnimation(Animation):
+    """Animation written as the XML serialized by a previous export"""
+
+    def __init__(self, fragment=b""):
+        super().__init__()
+        self.fragment = fragment
+
+    def to_xml(self):
+        return ET.fromstring(self.fragment)
+
+
 class Property(ElementTree):
     tag_name = "Item"
 
@@ -1,5 +1,6 @@
 from abc import ABC as AbstractClass, abstractmethod
 from xml.etree import ElementTree as ET
+import numpy as np
 from .element import (
     AttributeProperty,
     FlagsProperty,
@@ -25,6 +26,7 @@ from .bound import (
     BoundGeometryBVH,
     BoundSphere
 )
+from .xmlbuffers import get_prefetched_buffer, read_prefetched, get_semantic_dtype, split_vertex_data
 from collections import namedtuple
 from collections.abc import MutableSequence
 from enum import Enum
@@ -38,6 +40,10 @@ class YDD:
     def from_xml_file(filepath):
         return DrawableDictionary.from_xml_file(filepath)
 
+    @staticmethod
+    def from_prefetched(xml, buffers):
+        return read_prefetched(DrawableDictionary, xml, buffers)
+
     @staticmethod
     def write_xml(drawable_dict, filepath):
         return drawable_dict.write_xml(filepath)
@@ -51,6 +57,10 @@ class YDR:
     def from_xml_file(filepath):
         return Drawable.from_xml_file(filepath)
 
+    @staticmethod
+    def from_prefetched(xml, buffers):
+        return read_prefetched(Drawable, xml, buffers)
+
     @staticmethod
     def write_xml(drawable, filepath):
         return drawable.write_xml(filepath)
@@ -387,10 +397,17 @@ class VertexDataProperty(ElementProperty):
 
     def __init__(self, tag_name=None):
         super().__init__(tag_name=tag_name or "Data", value=[])
+        # Prefetched data and the number of components of each semantic, see VertexBuffer.from_xml
+        self.buffer = None
 
     @ classmethod
     def from_xml(cls, element: ET.Element):
         new = cls()
+        buffer = get_prefetched_buffer(element)
+        if buffer is not None:
+            new.buffer = buffer
+            return new
+
         if not element.text:
             return new
 
@@ -434,25 +451,55 @@ class VertexBuffer(ElementTree):
         self.layout = VertexLayoutListProperty()
         self.data = VertexDataProperty()
         self.data2 = VertexDataProperty("Data2")
+        # Array of each vertex semantic by name, set when read from prefetched data
+        self.columns = None
 
     def get_data(self):
+        if self.columns is not None and len(self.data) < 1 and len(self.data2) < 1:
+            # Vertices of prefetched data are only built when needed
+            vert_type = self.get_vertex_type()
+            self.data = list(map(vert_type._make, zip(
+                *[self.columns[name].tolist() for name in vert_type._fields])))
+
         if len(self.data) > 0:
             return self.data
         else:
             return self.data2
 
+    def get_columns(self):
+        """Array of each vertex semantic by name, with a row per vertex"""
+        if self.columns is None:
+            vertices = self.get_data()
+            if len(vertices) < 1:
+                return {}
+
+            self.columns = {name: np.array(values, dtype=get_semantic_dtype(name))
+                            for name, values in zip(vertices[0]._fields, zip(*vertices))}
+
+        return self.columns
+
     def get_vertex_type(self):
         return self.get_element("layout").vertex_type
 
     @ classmethod
     def from_xml(cls: Element, element: ET.Element):
         new = super().from_xml(element)
-        # Convert data to namedtuple matching the layout
         vert_type = new.get_vertex_type()
+        for name in ("data", "data2"):
+            buffer = new.get_element(name).buffer
+            if buffer is not None:
+                # Prefetched data stays in arrays, split by the layout
+                new.columns = split_vertex_data(*buffer, vert_type._fields)
+
+        # Convert data to namedtuple matching the layout
         new.data = list(map(lambda vert: vert_type(*vert), new.data))
         new.data2 = list(map(lambda vert: vert_type(*vert), new.data2))
         return new
 
+    def to_xml(self):
+        self.get_data()
+        return super().to_xml()
+
 
 class IndexDataProperty(ElementProperty):
     value_types = (int)
@@ -463,6 +510,11 @@ class IndexDataProperty(ElementProperty):
     @ classmethod
     def from_xml(cls, element: ET.Element):
         new = cls()
+        buffer = get_prefetched_buffer(element)
+        if buffer is not None:
+            new.value = buffer
+            return new
+
         indices = element.text.strip().replace("\n", "").split()
         new.value = [int(i) for i in indices]
 
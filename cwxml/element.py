@@ -1,6 +1,11 @@
 """Manages reading/writing Codewalker XML files"""
-from mathutils import Vector, Quaternion, Matrix
+try:
+    from mathutils import Vector, Quaternion, Matrix
+except ImportError:
+    # Imported outside of Blender, values are read into plain stand-ins
+    from .plainmath import Vector, Quaternion, Matrix
 from abc import abstractmethod, ABC as AbstractClass, abstractclassmethod
+from contextlib import contextmanager
 from dataclasses import dataclass
 from typing import Any
 from xml.etree import ElementTree as ET
@@ -87,8 +92,20 @@ class Element(AbstractClass):
         elementTree.write(filepath, encoding="UTF-8", xml_declaration=True)
 
 
+@contextmanager
+def skipped_elements(element_class, tags):
+    """Leave the children with the given tags unread when reading element_class (and its subclasses) in this context"""
+    element_class.skipped_tags = frozenset(tags)
+    try:
+        yield
+    finally:
+        del element_class.skipped_tags
+
+
 class ElementTree(Element):
     """XML element that contains children defined by it's properties"""
+    # Tags of children that from_xml leaves unread, see skipped_elements
+    skipped_tags = frozenset()
 
     @classmethod
     def from_xml(cls: Element, element: ET.Element):
@@ -97,6 +114,8 @@ class ElementTree(Element):
 
         for prop_name, obj_element in vars(new).items():
             if isinstance(obj_element, Element):
+                if obj_element.tag_name in cls.skipped_tags:
+                    continue
                 child = element.find(obj_element.tag_name)
                 if child is not None and obj_element.tag_name == child.tag:
                     # Add element to object if tag is defined in class definition
@@ -12,8 +12,42 @@ from .element import (
     ValueProperty,
     VectorProperty
 )
-from .drawable import Drawable, LightsProperty
+from .drawable import Drawable, LightsProperty, SkeletonProperty
 from .bound import BoundComposite
+from .xmlbuffers import read_prefetched
+
+
+class SkeletonReader:
+    """XMLParser target that only builds the skeleton of a fragment's drawable. Every
+    other element is skipped without being created."""
+    skeleton_path = ["Fragment", "Drawable", "Skeleton"]
+
+    def __init__(self):
+        self.path = []
+        self.builder = None
+        self.element = None
+
+    def start(self, tag, attrib):
+        self.path.append(tag)
+        if self.builder is None and self.path == self.skeleton_path:
+            self.builder = ET.TreeBuilder()
+        if self.builder is not None:
+            self.builder.start(tag, attrib)
+
+    def end(self, tag):
+        if self.builder is not None:
+            self.builder.end(tag)
+            if self.path == self.skeleton_path:
+                self.element = self.builder.close()
+                self.builder = None
+        self.path.pop()
+
+    def data(self, data):
+        if self.builder is not None:
+            self.builder.data(data)
+
+    def close(self):
+        return self.element
 
 
 class YFT:
@@ -24,6 +58,27 @@ class YFT:
     def from_xml_file(filepath):
         return Fragment.from_xml_file(filepath)
 
+    @staticmethod
+    def skeleton_from_xml_file(filepath, chunk_size=1 << 16):
+        """Read only the drawable skeleton from filepath, stopping as soon as it has been read"""
+        reader = SkeletonReader()
+        parser = ET.XMLParser(target=reader)
+        with open(filepath, "rb") as file:
+            while reader.element is None:
+                chunk = file.read(chunk_size)
+                if not chunk:
+                    break
+                parser.feed(chunk)
+
+        if reader.element is None:
+            return SkeletonProperty()
+
+        return SkeletonProperty.from_xml(reader.element)
+
+    @staticmethod
+    def from_prefetched(xml, buffers):
+        return read_prefetched(Fragment, xml, buffers)
+
     @staticmethod
     def write_xml(fragment, filepath):
         return fragment.write_xml(filepath)
@@ -0,0 +1,42 @@
+"""Stand-ins for the mathutils types values are read into, used when cwxml is imported
+outside of Blender, e.g. to evaluate animations with poseeval. They take the same
+constructor arguments and give the same component access as mathutils, and only hold
+the components: none of the math is implemented.
+"""
+
+
+class Vector(tuple):
+    def __new__(cls, values=(0.0, 0.0, 0.0)):
+        return super().__new__(cls, (float(value) for value in values))
+
+    x = property(lambda self: self[0])
+    y = property(lambda self: self[1])
+    z = property(lambda self: self[2])
+    w = property(lambda self: self[3])
+
+    @property
+    def length(self):
+        return sum(value * value for value in self) ** 0.5
+
+
+class Quaternion(tuple):
+    """Components in (w, x, y, z) order, same as mathutils"""
+
+    def __new__(cls, values=(1.0, 0.0, 0.0, 0.0)):
+        return super().__new__(cls, (float(value) for value in values))
+
+    w = property(lambda self: self[0])
+    x = property(lambda self: self[1])
+    y = property(lambda self: self[2])
+    z = property(lambda self: self[3])
+
+
+class Matrix(list):
+    """Rows of a matrix, the 4x4 identity by default"""
+
+    def __init__(self, rows=None):
+        if rows is None:
+            rows = [[1.0 if row == column else 0.0 for column in range(4)]
+                    for row in range(4)]
+
+        super().__init__([float(value) for value in row] for row in rows)
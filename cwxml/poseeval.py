@@ -0,0 +1,163 @@
+"""Evaluates the pose of a skeleton under a YCD animation at any time, without Blender.
+
+Works on an Animation parsed by clipsdictionary and a Skeleton parsed by drawable, which
+read into plain stand-ins for mathutils types outside of Blender, and only depends on
+NumPy otherwise, e.g. to check exports or compare animations on machines without Blender. Quaternion arrays use (w, x, y, z) component order, same as mathutils.
+"""
+import numpy as np
+from collections import namedtuple
+from .animcodec import (
+    AnimationData,
+    decode_channel_vectors,
+    decode_channel_quaternions,
+    get_sequence_frames
+)
+
+# Local transforms of each bone of the skeleton, and its local and model space matrices
+Pose = namedtuple("Pose", ["translations", "rotations",
+                  "scales", "local_matrices", "model_matrices"])
+
+
+def quaternion_to_matrix(q):
+    """Rotation matrices of an array of unit (w, x, y, z) quaternions"""
+    w, x, y, z = np.moveaxis(np.asarray(q), -1, 0)
+
+    return np.stack((
+        np.stack((1 - 2 * (y * y + z * z), 2 * (x * y - w * z), 2 * (x * z + w * y)), axis=-1),
+        np.stack((2 * (x * y + w * z), 1 - 2 * (x * x + z * z), 2 * (y * z - w * x)), axis=-1),
+        np.stack((2 * (x * z - w * y), 2 * (y * z + w * x), 1 - 2 * (x * x + y * y)), axis=-1),
+    ), axis=-2)
+
+
+def compose_matrices(translations, rotations, scales):
+    """4x4 matrices that scale, then rotate, then translate"""
+    matrices = np.zeros(translations.shape[:-1] + (4, 4))
+    matrices[..., :3, :3] = quaternion_to_matrix(
+        rotations) * scales[..., None, :]
+    matrices[..., :3, 3] = translations
+    matrices[..., 3, 3] = 1
+
+    return matrices
+
+
+class PoseEvaluator:
+    """Pose of a skeleton under an animation. Bones the animation does not animate keep the
+    transforms of the skeleton, animated values replace them the same as in game."""
+
+    def __init__(self, animation, skeleton):
+        bones = list(skeleton.bones)
+        self.bone_tags = np.array([bone.tag for bone in bones])
+        self.parent_indices = np.array([bone.parent_index for bone in bones])
+        self.translations = np.array([tuple(bone.translation) for bone in bones], dtype=np.float64).reshape(-1, 3)
+        self.rotations = np.array([tuple(bone.rotation) for bone in bones], dtype=np.float64).reshape(-1, 4)
+        self.scales = np.array([tuple(bone.scale) for bone in bones], dtype=np.float64).reshape(-1, 3)
+
+        # Bones ordered so parents always come before their children
+        depths = np.zeros(len(bones), dtype=np.int64)
+        for index in range(len(bones)):
+            parent_index = self.parent_indices[index]
+            while 0 <= parent_index < len(bones) and depths[index] <= len(bones):
+                depths[index] += 1
+                parent_index = self.parent_indices[parent_index]
+        self.depths = depths
+
+        bone_indices = {tag: index for index,
+                        tag in enumerate(self.bone_tags.tolist())}
+        tracks = []
+        for bone_data in animation.bone_ids:
+            if bone_data is None or bone_data.bone_id not in bone_indices or bone_data.track not in (0, 1, 2):
+                tracks.append(None)
+            else:
+                tracks.append(
+                    (bone_indices[bone_data.bone_id], bone_data.track))
+
+        sequences = [[sequence_data.get_channels_data() for sequence_data in sequence.sequence_data]
+                     for sequence in animation.sequences]
+
+        self.animation_data = AnimationData(
+            animation.frame_count, animation.sequence_frame_limit, sequences, tracks)
+        self.duration = animation.duration
+
+    def get_frame(self, time):
+        """Frame of the animation at time in seconds, clamped to its range"""
+        last_frame = max(self.animation_data.frame_count - 1, 0)
+        if self.duration <= 0:
+            return 0.0
+
+        return float(np.clip(time / self.duration * last_frame, 0, last_frame))
+
+    def sample_frames(self, frame_ids):
+        """Local translations, rotations and scales of every bone at each of frame_ids, as
+        arrays with a row per frame and bone"""
+        frame_ids = np.asarray(frame_ids, dtype=np.int64)
+        translations = np.broadcast_to(
+            self.translations, (len(frame_ids),) + self.translations.shape).copy()
+        rotations = np.broadcast_to(
+            self.rotations, (len(frame_ids),) + self.rotations.shape).copy()
+        scales = np.broadcast_to(
+            self.scales, (len(frame_ids),) + self.scales.shape).copy()
+
+        sequence_indices, sequence_frames = get_sequence_frames(
+            self.animation_data, frame_ids)
+
+        for sequence_index in np.unique(sequence_indices):
+            in_sequence = sequence_indices == sequence_index
+            frames = sequence_frames[in_sequence]
+            sequence = self.animation_data.sequences[sequence_index]
+
+            for channels, bone_track in zip(sequence, self.animation_data.tracks):
+                if bone_track is None:
+                    continue
+
+                bone_index, track = bone_track
+                if track == 0:
+                    translations[in_sequence, bone_index] = decode_channel_vectors(
+                        channels, frames)
+                elif track == 1:
+                    rotations[in_sequence, bone_index] = decode_channel_quaternions(
+                        channels, frames)
+                elif track == 2:
+                    scales[in_sequence, bone_index] = decode_channel_vectors(
+                        channels, frames)
+
+        return translations, rotations, scales
+
+    def get_model_matrices(self, local_matrices):
+        """Model space matrices of local_matrices, whose last 3 axes are bones and 4x4 matrices"""
+        model_matrices = local_matrices.copy()
+
+        for depth in range(1, self.depths.max(initial=0) + 1):
+            bone_indices = np.flatnonzero(self.depths == depth)
+            model_matrices[..., bone_indices, :, :] = model_matrices[..., self.parent_indices[bone_indices], :, :] @ \
+                local_matrices[..., bone_indices, :, :]
+
+        return model_matrices
+
+    def evaluate(self, time):
+        """Pose at time in seconds. Frames are interpolated the same as in game, linearly per
+        component with rotations normalized afterwards."""
+        frame = self.get_frame(time)
+        start_frame = int(frame)
+        end_frame = min(start_frame + 1,
+                        max(self.animation_data.frame_count - 1, 0))
+        factor = frame - start_frame
+
+        translations, rotations, scales = self.sample_frames(
+            [start_frame, end_frame])
+
+        translation = translations[0] + \
+            (translations[1] - translations[0]) * factor
+        scale = scales[0] + (scales[1] - scales[0]) * factor
+        rotation = rotations[0] + (rotations[1] - rotations[0]) * factor
+        lengths = np.linalg.norm(rotation, axis=-1)[:, None]
+        rotation = rotation / np.where(lengths > 0, lengths, 1)
+
+        local_matrices = compose_matrices(translation, rotation, scale)
+
+        return Pose(translation, rotation, scale, local_matrices, self.get_model_matrices(local_matrices))
+
+
+def evaluate_pose(animation, skeleton, time):
+    """Pose of skeleton under animation at time in seconds. Use a PoseEvaluator to evaluate
+    the same animation several times."""
+    return PoseEvaluator(animation, skeleton).evaluate(time)
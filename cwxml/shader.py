@@ -78,6 +78,8 @@ class Shader(ElementTree):
 class ShaderManager:
     shaderxml = os.path.join(os.path.dirname(__file__), "Shaders.xml")
     shaders = {}
+    # Modification time of shaderxml when it was last loaded
+    shaders_mtime = None
     terrains = ["terrain_cb_w_4lyr.sps", "terrain_cb_w_4lyr_lod.sps", "terrain_cb_w_4lyr_spec.sps", "terrain_cb_w_4lyr_spec_pxm.sps", "terrain_cb_w_4lyr_pxm_spm.sps",
                 "terrain_cb_w_4lyr_pxm.sps", "terrain_cb_w_4lyr_cm_pxm.sps", "terrain_cb_w_4lyr_cm_tnt.sps", "terrain_cb_w_4lyr_cm_pxm_tnt.sps", "terrain_cb_w_4lyr_cm.sps",
                 "terrain_cb_w_4lyr_2tex.sps", "terrain_cb_w_4lyr_2tex_blend.sps", "terrain_cb_w_4lyr_2tex_blend_lod.sps", "terrain_cb_w_4lyr_2tex_blend_pxm.sps",
@@ -121,10 +123,17 @@ class ShaderManager:
 
     @staticmethod
     def load_shaders():
+        ShaderManager.shaders_mtime = os.path.getmtime(ShaderManager.shaderxml)
         tree = ET.parse(ShaderManager.shaderxml)
+        ShaderManager.shaders.clear()
         for node in tree.getroot():
             shader = Shader.from_xml(node)
             ShaderManager.shaders[shader.name] = shader
 
+    @staticmethod
+    def shaders_changed():
+        """Whether Shaders.xml has been modified since it was loaded."""
+        return os.path.getmtime(ShaderManager.shaderxml) != ShaderManager.shaders_mtime
+
 
 ShaderManager.load_shaders()
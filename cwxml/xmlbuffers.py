@@ -0,0 +1,103 @@
+"""Reads the vertex and index buffers of drawable XML into NumPy arrays ahead of time.
+
+Only depends on the standard library and NumPy, so it can run in worker processes
+outside of Blender.
+"""
+import numpy as np
+from xml.etree import ElementTree as ET
+
+# Attribute left on a buffer element whose text was moved into the prefetched buffers
+BUFFER_ATTRIBUTE = "prefetched"
+
+# Buffers of the document currently being read by read_prefetched
+prefetched_buffers = []
+
+
+def parse_vertex_data(text):
+    """Parse vertex data text into a 2D array with one row per vertex, and the number of
+    components of each vertex semantic. Returns None if the rows are not uniform."""
+    lines = text.strip().split("\n")
+    widths = [len(item.split()) for item in lines[0].strip().split("   ")]
+    data = np.fromstring(text, dtype=np.float64, sep=" ")
+
+    if data.size != len(lines) * sum(widths):
+        return None
+
+    return data.reshape(len(lines), sum(widths)), widths
+
+
+def parse_index_data(text):
+    return np.fromstring(text, dtype=np.int64, sep=" ")
+
+
+def prefetch_buffers(filepath, skipped_tags=()):
+    """Parse filepath, converting every vertex and index buffer into an array.
+    Returns the document without the converted buffers' text or the elements
+    with skipped_tags, and the buffers."""
+    root = ET.parse(filepath).getroot()
+    buffers = []
+
+    if skipped_tags:
+        for parent in list(root.iter()):
+            for child in [child for child in parent if child.tag in skipped_tags]:
+                parent.remove(child)
+
+    def prefetch(element, parse):
+        if element is None or not element.text:
+            return
+
+        buffer = parse(element.text)
+        if buffer is None:
+            return
+
+        element.text = None
+        element.set(BUFFER_ATTRIBUTE, str(len(buffers)))
+        buffers.append(buffer)
+
+    for vertex_buffer in root.iter("VertexBuffer"):
+        prefetch(vertex_buffer.find("Data"), parse_vertex_data)
+        prefetch(vertex_buffer.find("Data2"), parse_vertex_data)
+
+    for index_buffer in root.iter("IndexBuffer"):
+        prefetch(index_buffer.find("Data"), parse_index_data)
+
+    return ET.tostring(root), buffers
+
+
+def get_prefetched_buffer(element):
+    index = element.get(BUFFER_ATTRIBUTE)
+    if index is None:
+        return None
+
+    return prefetched_buffers[int(index)]
+
+
+# Vertex semantics whose components are integers, the components of every other one are floats
+INTEGER_SEMANTICS = ("blendweights", "blendindices", "colour0", "colour1")
+
+
+def get_semantic_dtype(name):
+    """Type of the components of the vertex semantic called name, in lowercase"""
+    return np.int32 if name in INTEGER_SEMANTICS else np.float32
+
+
+def split_vertex_data(data, widths, names):
+    """Split prefetched vertex data into an array per vertex semantic, by name, typed to
+    match the vertex layout."""
+    columns = {}
+    start = 0
+    for name, width in zip(names, widths):
+        columns[name] = data[:, start:start + width].astype(
+            get_semantic_dtype(name))
+        start += width
+
+    return columns
+
+
+def read_prefetched(element_class, xml, buffers):
+    """Read the document returned by prefetch_buffers as element_class."""
+    prefetched_buffers[:] = buffers
+    try:
+        return element_class.from_xml(ET.fromstring(xml))
+    finally:
+        prefetched_buffers.clear()
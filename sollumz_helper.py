@@ -4,6 +4,7 @@ import os
 import time
 from abc import abstractmethod
 from .tools.blenderhelper import get_children_recursive
+from .tools.utils import run_steps
 from .sollumz_properties import BOUND_TYPES
 from .ydr.ydrexport import get_used_materials
 
@@ -33,9 +34,12 @@ class SOLLUMZ_OT_base:
                 f"Error occured running operator : {self.bl_idname} \n {traceback.format_exc()}")
         end = time.time()
 
+        return self.finish(result, end - start)
+
+    def finish(self, result, duration):
         if self.bl_showtime and result == True:
             self.message(
-                f"{self.bl_label} took {round(end - start, 3)} seconds to {self.bl_action}.")
+                f"{self.bl_label} took {round(duration, 3)} seconds to {self.bl_action}.")
 
         if len(self.messages) > 0:
             self.message("\n".join(self.messages))
@@ -55,6 +59,98 @@ class SOLLUMZ_OT_base:
         self.report({"ERROR"}, msg)
 
 
+class SOLLUMZ_OT_modal_base(SOLLUMZ_OT_base):
+    """Operator whose work is split into steps, which can also be run a few at a time on a timer
+    so Blender keeps redrawing and shows progress. Other input is blocked meanwhile. Esc cancels and
+    removes everything created so far."""
+    # Seconds of steps to run on each timer tick
+    bl_time_budget = 0.05
+    # bpy.data collections whose new datablocks are removed when cancelled
+    bl_rollback_collections = ("objects", "meshes", "materials", "images", "textures",
+                               "armatures", "lights", "actions", "node_groups", "collections")
+
+    def __init__(self):
+        super().__init__()
+        self.progress = 0
+        self.status = ""
+
+    @abstractmethod
+    def iter_steps(self, context):
+        """Yields a description of each step before running it. Returns the result of the operator."""
+        pass
+
+    def run(self, context):
+        return run_steps(self.iter_steps(context))
+
+    def execute_modal(self, context):
+        self.steps = self.iter_steps(context)
+        self.start = time.time()
+        self.existing_ids = {name: {id.as_pointer() for id in getattr(bpy.data, name)}
+                             for name in self.bl_rollback_collections}
+
+        wm = context.window_manager
+        self.timer = wm.event_timer_add(0.01, window=context.window)
+        wm.modal_handler_add(self)
+        wm.progress_begin(0, 1)
+
+        return {"RUNNING_MODAL"}
+
+    def modal(self, context, event):
+        if event.type == "ESC" and event.value == "PRESS":
+            self.stop(context)
+            self.rollback()
+            self.warning(f"{self.bl_label} cancelled.")
+            return {"CANCELLED"}
+
+        if event.type != "TIMER":
+            # Other input is blocked until all steps ran, edits made meanwhile could not be rolled back
+            return {"RUNNING_MODAL"}
+
+        deadline = time.time() + self.bl_time_budget
+        try:
+            while time.time() < deadline:
+                step = next(self.steps)
+        except StopIteration as stop:
+            result = stop.value
+        except:
+            result = False
+            self.error(
+                f"Error occured running operator : {self.bl_idname} \n {traceback.format_exc()}")
+        else:
+            context.window_manager.progress_update(self.progress)
+            context.workspace.status_text_set(
+                f"{self.status}: {step} (Esc to cancel)")
+            return {"RUNNING_MODAL"}
+
+        self.stop(context)
+        if result and self.bl_update_view:
+            reset_sollumz_view(context.scene)
+
+        return self.finish(result, time.time() - self.start)
+
+    def cancel(self, context):
+        # Cancelled by Blender rather than by the user, e.g. the window was closed
+        self.stop(context)
+        self.steps.close()
+
+    def stop(self, context):
+        wm = context.window_manager
+        wm.event_timer_remove(self.timer)
+        wm.progress_end()
+        context.workspace.status_text_set(None)
+
+    def rollback(self):
+        self.steps.close()
+
+        created = []
+        for name in self.bl_rollback_collections:
+            existing = self.existing_ids[name]
+            created.extend(id for id in getattr(bpy.data, name)
+                           if id.as_pointer() not in existing)
+
+        bpy.data.batch_remove(created)
+
+
 def reset_sollumz_view(scene):
     scene.hide_collision = not scene.hide_collision
     scene.hide_high_lods = not scene.hide_high_lods
@@ -1,10 +1,11 @@
 import traceback
 import os
+from functools import partial
 import pathlib
 import bpy
 from bpy_extras.io_utils import ImportHelper
 from mathutils import Vector
-from .sollumz_helper import SOLLUMZ_OT_base
+from .sollumz_helper import SOLLUMZ_OT_base, SOLLUMZ_OT_modal_base
 from .sollumz_properties import SollumType, SOLLUMZ_UI_NAMES, BOUND_TYPES, SollumzExportSettings, SollumzImportSettings, TimeFlags
 from .cwxml.drawable import YDR, YDD
 from .cwxml.fragment import YFT
@@ -13,11 +14,13 @@ from .cwxml.navmesh import YNV
 from .cwxml.clipsdictionary import YCD
 from .cwxml.ytyp import YTYP
 from .cwxml.ymap import YMAP, EntityItem, CMapData
-from .ydr.ydrimport import import_ydr
+from .cwxml.xmlbuffers import prefetch_buffers
+from .ydr.ydrimport import iter_import_ydr, get_skipped_model_tags, mesh_cache
 from .ydr.ydrexport import export_ydr
-from .ydd.yddimport import import_ydd
+from .ydr.shader_materials import reload_changed_shaders
+from .ydd.yddimport import iter_import_ydd
 from .ydd.yddexport import export_ydd
-from .yft.yftimport import import_yft
+from .yft.yftimport import iter_import_yft
 from .yft.yftexport import export_yft
 from .ybn.ybnimport import import_ybn
 from .ybn.ybnexport import export_ybn
@@ -28,9 +31,10 @@ from .tools.meshhelper import get_bound_extents
 from .tools.utils import subtract_from_vector, add_to_vector, get_min_vector, get_max_vector
 from .tools.blenderhelper import get_terrain_texture_brush
 from .tools.ytyphelper import ytyp_from_objects
+from .tools.workerpool import create_process_pool, submit_prefetched
 
 
-class SOLLUMZ_OT_import(SOLLUMZ_OT_base, bpy.types.Operator, ImportHelper):
+class SOLLUMZ_OT_import(SOLLUMZ_OT_modal_base, bpy.types.Operator, ImportHelper):
     """Imports xml files exported by codewalker"""
     bl_idname = "sollumz.import"
     bl_label = "Import Codewalker XML"
@@ -51,6 +55,9 @@ class SOLLUMZ_OT_import(SOLLUMZ_OT_base, bpy.types.Operator, ImportHelper):
 
     import_settings: bpy.props.PointerProperty(type=SollumzImportSettings)
 
+    # Set when run from the file browser rather than by a script
+    is_interactive: bpy.props.BoolProperty(options={"HIDDEN", "SKIP_SAVE"})
+
     filename_exts = [YDR.file_extension, YDD.file_extension,
                      YFT.file_extension, YBN.file_extension,
                      YNV.file_extension, YCD.file_extension]
@@ -58,51 +65,118 @@ class SOLLUMZ_OT_import(SOLLUMZ_OT_base, bpy.types.Operator, ImportHelper):
     def draw(self, context):
         pass
 
-    def import_file(self, filepath, ext):
+    # Formats parsed ahead of time by worker processes when importing several files
+    prefetch_formats = {YDR.file_extension: YDR,
+                        YDD.file_extension: YDD, YFT.file_extension: YFT}
+
+    def invoke(self, context, event):
+        self.is_interactive = True
+        return ImportHelper.invoke(self, context, event)
+
+    def execute(self, context):
+        if self.is_interactive and self.import_settings.show_progress:
+            return self.execute_modal(context)
+        return super().execute(context)
+
+    def iter_import_file(self, filepath, ext, prefetched=None):
         try:
+            xml = None
+            if prefetched is not None:
+                yield "Reading"
+                xml = self.prefetch_formats[ext].from_prefetched(*prefetched)
+
             valid_type = False
             if ext == YDR.file_extension:
-                import_ydr(filepath, self.import_settings)
+                yield from iter_import_ydr(filepath, self.import_settings, xml)
                 valid_type = True
             elif ext == YDD.file_extension:
-                import_ydd(self, filepath, self.import_settings)
+                yield from iter_import_ydd(self, filepath, self.import_settings, xml)
                 valid_type = True
             elif ext == YFT.file_extension:
-                import_yft(filepath, self.import_settings)
+                yield from iter_import_yft(filepath, self.import_settings, xml)
                 valid_type = True
             elif ext == YBN.file_extension:
+                yield "Bounds"
                 import_ybn(filepath)
                 valid_type = True
             elif ext == YNV.file_extension:
+                yield "Navmesh"
                 import_ynv(filepath)
             elif ext == YCD.file_extension:
+                yield "Animations"
                 import_ycd(self, filepath, self.import_settings)
 
             if valid_type:
                 self.message(f"Succesfully imported: {filepath}")
-        except:
+        except Exception:
             self.error(
                 f"Error importing: {filepath} \n {traceback.format_exc()}")
             return False
 
         return True
 
-    def run(self, context):
-        result = False
+    def get_files(self):
+        files = []
         if self.import_settings.batch_mode == "DIRECTORY":
             folderpath = os.path.dirname(self.filepath)
             for file in os.listdir(folderpath):
                 ext = "".join(pathlib.Path(file).suffixes)
                 if ext in self.filename_exts:
-                    filepath = os.path.join(folderpath, file)
-                    result = self.import_file(filepath, ext)
+                    files.append((os.path.join(folderpath, file), ext))
         else:
             for file_elem in self.files:
                 directory = os.path.dirname(self.filepath)
                 filepath = os.path.join(directory, file_elem.name)
                 if os.path.isfile(filepath):
-                    ext = "".join(pathlib.Path(filepath).suffixes)
-                    result = self.import_file(filepath, ext)
+                    files.append(
+                        (filepath, "".join(pathlib.Path(filepath).suffixes)))
+
+        return files
+
+    def prefetch_files(self, files):
+        """Yields each file with its prefetched parse result, or None if it is parsed
+        while being imported. Drawable files are parsed by a process pool ahead of the
+        file currently being imported."""
+        prefetchable = [filepath for filepath,
+                        ext in files if ext in self.prefetch_formats]
+
+        if not self.import_settings.parallel_parse or len(prefetchable) < 2:
+            for filepath, ext in files:
+                yield filepath, ext, None
+            return
+
+        depth = self.import_settings.prefetch_depth
+        parse = partial(prefetch_buffers, skipped_tags=get_skipped_model_tags(
+            self.import_settings))
+        with create_process_pool(depth) as pool:
+            prefetched = submit_prefetched(pool, parse, prefetchable, depth)
+
+            for filepath, ext in files:
+                result = None
+                if ext in self.prefetch_formats:
+                    try:
+                        _, future = next(prefetched)
+                        result = future.result()
+                    except Exception:
+                        # Parsed again while importing, which reports the error
+                        result = None
+
+                yield filepath, ext, result
+
+    def iter_steps(self, context):
+        result = False
+        files = self.get_files()
+        mesh_cache.clear()
+        reload_changed_shaders()
+        for index, (filepath, ext, prefetched) in enumerate(self.prefetch_files(files)):
+            self.progress = index / len(files)
+            self.status = f"Importing {os.path.basename(filepath)} ({index + 1}/{len(files)})"
+            result = yield from self.iter_import_file(filepath, ext, prefetched)
+
+        if mesh_cache.shared_count > 0:
+            self.message(
+                f"Shared {mesh_cache.shared_count} identical meshes, saving about {round(mesh_cache.shared_bytes / (1024 * 1024), 2)} MB.")
+        mesh_cache.clear()
 
         if not result:
             self.bl_showtime = False
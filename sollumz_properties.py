@@ -1,4 +1,5 @@
 import bpy
+from math import radians
 from enum import Enum
 from .tools.utils import flag_list_to_int, flag_prop_to_list, int_to_bool_list
 
@@ -489,12 +490,52 @@ class SollumzImportSettings(bpy.types.PropertyGroup):
                ("DIRECTORY", "Directory", "Import every file from active directory the file browser is in"))
     )
 
+    show_progress: bpy.props.BoolProperty(
+        name="Show Progress",
+        description="Imports in small steps while showing progress. Other input is blocked until the import is done. Press Esc to cancel the import and remove everything it created.",
+        default=False,
+    )
+
+    parallel_parse: bpy.props.BoolProperty(
+        name="Parallel Parsing",
+        description="Parses upcoming drawable files in background processes while the current file is imported. Starting the processes takes a moment, so this only pays off for many or large files.",
+        default=False,
+    )
+
+    prefetch_depth: bpy.props.IntProperty(
+        name="Prefetch Depth",
+        description="Maximum number of files parsed ahead of the file being imported. Higher values use more memory.",
+        default=4,
+        min=1,
+        max=64,
+    )
+
     join_geometries: bpy.props.BoolProperty(
         name="Join Geometries",
         description="Joins the drawables geometries into a single mesh.",
         default=True,
     )
 
+    share_meshes: bpy.props.BoolProperty(
+        name="Share Identical Meshes",
+        description="Geometries identical to one imported before reuse its mesh instead of creating a copy. Shared meshes are linked, editing one edits all of them.",
+        default=False,
+    )
+
+    import_lods: bpy.props.EnumProperty(
+        name="LODs",
+        options={"ENUM_FLAG"},
+        items=((LODLevel.HIGH.value, "High", ""),
+               (LODLevel.MEDIUM.value, "Medium", ""),
+               (LODLevel.LOW.value, "Low", ""),
+               (LODLevel.VERYLOW.value, "Very Low", "")),
+        description="Which LOD levels of drawables to import. Models of other levels are skipped while reading the file",
+        default={LODLevel.HIGH.value,
+                 LODLevel.MEDIUM.value,
+                 LODLevel.LOW.value,
+                 LODLevel.VERYLOW.value},
+    )
+
     split_by_bone: bpy.props.BoolProperty(
         name="Split by Bone",
         description="Splits the geometries by bone.",
@@ -513,6 +554,26 @@ class SollumzImportSettings(bpy.types.PropertyGroup):
         default=-1,
     )
 
+    parallel_animations: bpy.props.BoolProperty(
+        name="Parallel Decoding",
+        description="Decodes animations in background processes while the actions of the current one are created. Starting the processes takes a moment, so this only pays off for many or long animations.",
+        default=False,
+    )
+
+    reduce_keyframes: bpy.props.BoolProperty(
+        name="Reduce Keyframes",
+        description="Only keep the keyframes needed to follow the animation within the tolerance, with linear interpolation between them.",
+        default=False,
+    )
+
+    keyframe_tolerance: bpy.props.FloatProperty(
+        name="Tolerance",
+        description="Maximum difference between a reduced curve and the animation's value at any frame.",
+        default=0.0001,
+        min=0,
+        precision=5,
+    )
+
 
 class SollumzExportSettings(bpy.types.PropertyGroup):
     local: bpy.props.BoolProperty(
@@ -581,6 +642,86 @@ class SollumzExportSettings(bpy.types.PropertyGroup):
         description="Exports a .ytyp.xml with an archetype for every drawable or drawable dictionary being exported.",
         default=False
     )
+    sequence_frame_limit: bpy.props.IntProperty(
+        name="Frames per Sequence",
+        description="Animations longer than this are split into sequences of this many frames, each compressed on its own.",
+        default=127,
+        min=1,
+        max=65535
+    )
+    resample_animations: bpy.props.BoolProperty(
+        name="Resample",
+        description="Sample animations at the Frame Rate below instead of the scene frame rate. Clips keep playing at the same speed",
+        default=False
+    )
+    animation_fps: bpy.props.FloatProperty(
+        name="Frame Rate",
+        description="Frames per second of exported animations when resampling",
+        default=30.0,
+        min=1.0,
+        max=240.0
+    )
+    limit_frame_range: bpy.props.BoolProperty(
+        name="Limit Frame Range",
+        description="Only export the frames of every animation between Start and End. Clips are cut down to the frames kept",
+        default=False
+    )
+    frame_range_start: bpy.props.IntProperty(
+        name="Start",
+        description="First frame of the actions exported",
+        default=0,
+        min=0
+    )
+    frame_range_end: bpy.props.IntProperty(
+        name="End",
+        description="Last frame of the actions exported",
+        default=250,
+        min=0
+    )
+    quaternion_channels: bpy.props.EnumProperty(
+        name="Rotation Channels",
+        items=(("FULL", "All Components", "Write all four quaternion components"),
+               ("DROP_W", "Cache W", "Leave out the W component, which the game rebuilds from the others"),
+               ("DROP_LARGEST", "Cache Largest", "Leave out the largest component, which the game rebuilds from the others")),
+        description="Which quaternion components of animated rotations are written. Tracks whose left out component would change sign keep all four",
+        default="FULL"
+    )
+    share_duplicate_animations: bpy.props.BoolProperty(
+        name="Share Identical Animations",
+        description="Writes animations that are identical once encoded only once, with the clips of the others referencing it instead.",
+        default=False
+    )
+    use_animation_cache: bpy.props.BoolProperty(
+        name="Reuse Unchanged Animations",
+        description="Writes animations whose actions, armature rest pose and export settings have not changed since the last export from the cached XML instead of encoding them again. Actions with drivers are always encoded again.",
+        default=False
+    )
+    parallel_animations: bpy.props.BoolProperty(
+        name="Parallel Encoding",
+        description="Encodes the channels of each animation in background processes once its actions have been sampled. Starting the processes takes a moment, so this only pays off for many or long animations.",
+        default=False
+    )
+    compress_animations: bpy.props.BoolProperty(
+        name="Compress Animations",
+        description="Quantize animation channels as coarsely as the maximum errors allow, picking the smallest channel type for each.",
+        default=False
+    )
+    max_position_error: bpy.props.FloatProperty(
+        name="Max Location Error",
+        description="Maximum distance between a compressed location, scale or UV value and the original.",
+        default=0.0005,
+        min=0,
+        precision=5,
+        unit="LENGTH"
+    )
+    max_rotation_error: bpy.props.FloatProperty(
+        name="Max Rotation Error",
+        description="Maximum angle between a compressed rotation and the original.",
+        default=radians(0.05),
+        min=0,
+        precision=4,
+        subtype="ANGLE"
+    )
 
 
 def hide_obj_and_children(obj, value):
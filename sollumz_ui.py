@@ -38,6 +38,11 @@ class SOLLUMZ_PT_import_main(bpy.types.Panel):
         operator = sfile.active_operator
 
         layout.prop(operator.import_settings, "batch_mode")
+        layout.prop(operator.import_settings, "show_progress")
+        layout.prop(operator.import_settings, "parallel_parse")
+        row = layout.row()
+        row.enabled = operator.import_settings.parallel_parse
+        row.prop(operator.import_settings, "prefetch_depth")
 
 
 class SOLLUMZ_PT_import_geometry(bpy.types.Panel):
@@ -62,6 +67,8 @@ class SOLLUMZ_PT_import_geometry(bpy.types.Panel):
         operator = sfile.active_operator
 
         layout.prop(operator.import_settings, "join_geometries")
+        layout.prop(operator.import_settings, "share_meshes")
+        layout.prop(operator.import_settings, "import_lods")
 
 
 class SOLLUMZ_PT_import_fragment(bpy.types.Panel):
@@ -162,6 +169,12 @@ class SOLLUMZ_PT_import_animation(bpy.types.Panel):
         armature_list_box.template_list(SOLLUMZ_UL_armature_list.bl_idname, "",
                                         bpy.data, "armatures", operator.import_settings, "selected_armature")
 
+        layout.prop(operator.import_settings, "parallel_animations")
+        layout.prop(operator.import_settings, "reduce_keyframes")
+        row = layout.row()
+        row.enabled = operator.import_settings.reduce_keyframes
+        row.prop(operator.import_settings, "keyframe_tolerance")
+
 
 class SOLLUMZ_PT_export_main(bpy.types.Panel):
     bl_space_type = "FILE_BROWSER"
@@ -296,6 +309,48 @@ class SOLLUMZ_PT_export_fragment(bpy.types.Panel):
         layout.prop(operator.export_settings, "export_with_hi")
 
 
+class SOLLUMZ_PT_export_animation(bpy.types.Panel):
+    bl_space_type = "FILE_BROWSER"
+    bl_region_type = "TOOL_PROPS"
+    bl_label = "Animation"
+    bl_parent_id = "FILE_PT_operator"
+    bl_order = 5
+
+    @classmethod
+    def poll(cls, context):
+        sfile = context.space_data
+        operator = sfile.active_operator
+        return operator.bl_idname == "SOLLUMZ_OT_export"
+
+    def draw(self, context):
+        layout = self.layout
+        layout.use_property_split = True
+        layout.use_property_decorate = False
+
+        sfile = context.space_data
+        operator = sfile.active_operator
+
+        layout.prop(operator.export_settings, "sequence_frame_limit")
+        layout.prop(operator.export_settings, "resample_animations")
+        col = layout.column()
+        col.enabled = operator.export_settings.resample_animations
+        col.prop(operator.export_settings, "animation_fps")
+        layout.prop(operator.export_settings, "limit_frame_range")
+        col = layout.column(align=True)
+        col.enabled = operator.export_settings.limit_frame_range
+        col.prop(operator.export_settings, "frame_range_start")
+        col.prop(operator.export_settings, "frame_range_end")
+        layout.prop(operator.export_settings, "quaternion_channels")
+        layout.prop(operator.export_settings, "parallel_animations")
+        layout.prop(operator.export_settings, "use_animation_cache")
+        layout.prop(operator.export_settings, "share_duplicate_animations")
+        layout.prop(operator.export_settings, "compress_animations")
+        col = layout.column()
+        col.enabled = operator.export_settings.compress_animations
+        col.prop(operator.export_settings, "max_position_error")
+        col.prop(operator.export_settings, "max_rotation_error")
+
+
 class SOLLUMZ_PT_TOOL_PANEL(bpy.types.Panel):
     bl_label = "General Tools"
     bl_idname = "SOLLUMZ_PT_TOOL_PANEL"
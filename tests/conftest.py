@@ -0,0 +1,14 @@
+"""Makes the add-on importable as the sollumz package outside of Blender, for the modules
+that only depend on NumPy."""
+import importlib.util
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+if "sollumz" not in sys.modules:
+    spec = importlib.util.spec_from_file_location(
+        "sollumz", os.path.join(ROOT, "__init__.py"), submodule_search_locations=[ROOT])
+    module = importlib.util.module_from_spec(spec)
+    sys.modules["sollumz"] = module
+    spec.loader.exec_module(module)
@@ -0,0 +1,45 @@
+import numpy as np
+
+from sollumz.cwxml.animcodec import (
+    TrackEncoder,
+    decode_channel_quaternions,
+    get_cached_component_index,
+    reduce_keyframes,
+)
+
+
+def normalized(quaternions):
+    quaternions = np.asarray(quaternions, dtype=np.float64)
+    return quaternions / np.linalg.norm(quaternions, axis=1)[:, None]
+
+
+# (x, y, z, w) frames whose w changes sign, so W can not be cached without a hemisphere flip
+CROSSING_TRACK = normalized([[.9, .1, 0, .1], [.5, .2, 0, -.3], [.5, .2, 0, -.6]])
+
+
+def test_cached_component_fallback_leaves_quaternions_unchanged():
+    quaternions = CROSSING_TRACK.copy()
+
+    index, values = get_cached_component_index(quaternions, drop_largest=False)
+
+    assert index is None
+    np.testing.assert_array_equal(quaternions, CROSSING_TRACK)
+    np.testing.assert_array_equal(values, CROSSING_TRACK)
+
+
+def test_rotation_track_fallback_stays_hemisphere_continuous():
+    # Track values are (w, x, y, z) rows
+    track = CROSSING_TRACK[:, [3, 0, 1, 2]]
+    assert np.all(np.sum(track[1:] * track[:-1], axis=1) > 0)
+
+    channels = TrackEncoder("DROP_W").encode_track(1, track)
+
+    assert "CachedQuaternion1" not in [channel.type for channel in channels]
+    decoded = decode_channel_quaternions(channels, np.arange(len(track)))
+    np.testing.assert_allclose(decoded, track)
+    assert np.all(np.sum(decoded[1:] * decoded[:-1], axis=1) > 0)
+
+
+def test_reduce_keyframes_keeps_both_frames_of_changing_track():
+    np.testing.assert_array_equal(reduce_keyframes(np.array([[0.], [10.]]), 1e-4), [0, 1])
+    np.testing.assert_array_equal(reduce_keyframes(np.array([[0.], [0.]]), 1e-4), [0])
@@ -0,0 +1,66 @@
+from xml.etree import ElementTree as ET
+
+import numpy as np
+
+from sollumz.cwxml.clipsdictionary import ClipsDictionary
+from sollumz.cwxml.drawable import SkeletonProperty
+from sollumz.cwxml.poseeval import evaluate_pose
+
+# Root bone turning 90 degrees around Z over one second, its child one unit along X
+YCD_XML = """<ClipsDictionary>
+  <Clips />
+  <Animations>
+    <Item>
+      <Hash>turn</Hash>
+      <FrameCount value="2" />
+      <SequenceFrameLimit value="32" />
+      <Duration value="1" />
+      <BoneIds>
+        <Item><BoneId value="0" /><Track value="1" /><Unk0 value="1" /></Item>
+      </BoneIds>
+      <Sequences>
+        <Item>
+          <Hash>hash_00000000</Hash>
+          <FrameCount value="2" />
+          <SequenceData>
+            <Item>
+              <Channels>
+                <Item><Type value="StaticFloat" /><Value value="0" /></Item>
+                <Item><Type value="StaticFloat" /><Value value="0" /></Item>
+                <Item><Type value="RawFloat" /><Values>0 0.70710677</Values></Item>
+                <Item><Type value="RawFloat" /><Values>1 0.70710677</Values></Item>
+              </Channels>
+            </Item>
+          </SequenceData>
+        </Item>
+      </Sequences>
+    </Item>
+  </Animations>
+</ClipsDictionary>"""
+
+SKELETON_XML = """<Skeleton>
+  <Bones>
+    <Item>
+      <Name>root</Name><Tag value="0" /><Index value="0" /><ParentIndex value="-1" />
+      <Translation x="0" y="0" z="0" /><Rotation x="0" y="0" z="0" w="1" /><Scale x="1" y="1" z="1" />
+    </Item>
+    <Item>
+      <Name>child</Name><Tag value="100" /><Index value="1" /><ParentIndex value="0" />
+      <Translation x="1" y="0" z="0" /><Rotation x="0" y="0" z="0" w="1" /><Scale x="1" y="1" z="1" />
+    </Item>
+  </Bones>
+</Skeleton>"""
+
+
+def test_evaluate_pose_without_blender():
+    animation = ClipsDictionary.from_xml(ET.fromstring(YCD_XML)).animations[0]
+    skeleton = SkeletonProperty.from_xml(ET.fromstring(SKELETON_XML))
+
+    start = evaluate_pose(animation, skeleton, 0.0)
+    end = evaluate_pose(animation, skeleton, 1.0)
+    middle = evaluate_pose(animation, skeleton, 0.5)
+
+    np.testing.assert_allclose(start.model_matrices[1, :3, 3], (1, 0, 0), atol=1e-6)
+    np.testing.assert_allclose(end.model_matrices[1, :3, 3], (0, 1, 0), atol=1e-6)
+    np.testing.assert_allclose(
+        middle.model_matrices[1, :3, 3], (np.sqrt(0.5), np.sqrt(0.5), 0), atol=1e-6)
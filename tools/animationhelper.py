@@ -1,6 +1,7 @@
-from sys import float_info
-from mathutils import Quaternion, Vector, Euler
+import numpy as np
+from mathutils import Matrix
 from enum import IntFlag, IntEnum
+from ..cwxml.animcodec import RestTransform
 
 ped_bone_tags = [
     11816,
@@ -95,82 +96,164 @@ def is_ped_bone_tag(bone_tag):
     return bone_tag in ped_bone_tags
 
 
-def evaluate_vector(fcurves, data_path, frames):
-    xCurve = fcurves.find(data_path, index=0)
-    yCurve = fcurves.find(data_path, index=1)
-    zCurve = fcurves.find(data_path, index=2)
+def get_rest_transform(p_bone):
+    """Transforms of a bone in the rest pose that game-local animation values are relative to"""
+    mat = p_bone.bone.matrix_local
 
-    if xCurve is None:
-        return []
+    if p_bone.bone.parent is not None:
+        mat = p_bone.bone.parent.matrix_local.inverted() @ p_bone.bone.matrix_local
 
-    result = []
-    for frame_id in range(0, frames):
-        x = xCurve.evaluate(frame_id)
-        y = yCurve.evaluate(frame_id)
-        z = zCurve.evaluate(frame_id)
+    bone_location, bone_rotation, _ = mat.decompose()
 
-        result.append(Vector((x, y, z)))
-    return result
+    pose_rotation_inverse = None
+    if p_bone.parent is not None:
+        pose_rotation_inverse = np.array(
+            Matrix.to_quaternion(p_bone.bone.matrix).inverted())
 
+    return RestTransform(np.array(bone_location), np.array(bone_rotation.inverted()), pose_rotation_inverse)
 
-def evaluate_euler_to_quaternion(fcurves, data_path, frames):
-    xCurve = fcurves.find(data_path, index=0)
-    yCurve = fcurves.find(data_path, index=1)
-    zCurve = fcurves.find(data_path, index=2)
 
-    if xCurve is None:
-        return []
+def build_rest_transforms(armature):
+    return {p_bone.name: get_rest_transform(p_bone) for p_bone in armature.pose.bones}
 
-    result = []
-    for frame_id in range(0, frames):
-        x = xCurve.evaluate(frame_id)
-        y = yCurve.evaluate(frame_id)
-        z = zCurve.evaluate(frame_id)
 
-        result.append(Euler((x, y, z)).to_quaternion())
-    return result
+def euler_to_quaternion(eulers):
+    """Quaternions of an array of XYZ euler rotations, same as Euler.to_quaternion"""
+    half = np.asarray(eulers) / 2
+    cx, cy, cz = np.moveaxis(np.cos(half), -1, 0)
+    sx, sy, sz = np.moveaxis(np.sin(half), -1, 0)
 
+    return np.stack((
+        cx * cy * cz + sx * sy * sz,
+        sx * cy * cz - cx * sy * sz,
+        cx * sy * cz + sx * cy * sz,
+        cx * cy * sz - sx * sy * cz,
+    ), axis=-1)
 
-def evaluate_quaternion(fcurves, data_path, frames):
-    wCurve = fcurves.find(data_path, index=0)
-    xCurve = fcurves.find(data_path, index=1)
-    yCurve = fcurves.find(data_path, index=2)
-    zCurve = fcurves.find(data_path, index=3)
 
-    if xCurve is None:
-        return []
+def get_uv_vector_math_node(material):
+    """Vector Math node of a material whose second input holds its animated UV offset"""
+    for node in material.node_tree.nodes:
+        if node.type == 'VECT_MATH':
+            return node
 
-    result = []
-    for frame_id in range(0, frames):
-        w = wCurve.evaluate(frame_id)
-        x = xCurve.evaluate(frame_id)
-        y = yCurve.evaluate(frame_id)
-        z = zCurve.evaluate(frame_id)
+    return None
 
-        result.append(Quaternion((w, x, y, z)))
-    return result
 
+# Default values of the components of rotation_quaternion and scale
+QUATERNION_DEFAULTS = (1.0, 0.0, 0.0, 0.0)
+SCALE_DEFAULTS = (1.0, 1.0, 1.0)
 
-def get_quantum_and_min_val(nums):
-    min_val = float_info.max
-    max_val = float_info.min
-    min_delta = float_info.max
-    last_val = 0
+# Values of the Keyframe.interpolation enum, as read by foreach_get
+INTERPOLATION_CONSTANT = 0
+INTERPOLATION_LINEAR = 1
+INTERPOLATION_BEZIER = 2
 
-    for value in nums:
-        min_val = min(min_val, value)
-        max_val = max(max_val, value)
 
-        if value != last_val:
-            min_delta = min(min_delta, abs(value - last_val))
+def can_sample_fcurve(fcurve, interpolation):
+    """Whether sample_fcurve can evaluate fcurve from its keyframes alone, interpolation
+    being the interpolation of each of its keyframes as read by foreach_get"""
+    if len(interpolation) < 1 or len(fcurve.modifiers) > 0:
+        return False
 
-        last_val = value
+    if getattr(fcurve, "driver", None) is not None or fcurve.extrapolation != "CONSTANT":
+        return False
 
-    if min_delta == float_info.max:
-        min_delta = 0
+    return bool(np.all(interpolation <= INTERPOLATION_BEZIER))
 
-    range_value = max_val - min_val
-    min_quant = range_value / 1048576
-    quantum = max(min_delta, min_quant)
 
-    return min_val, quantum
+def solve_bezier_segments(x0, x1, x2, x3, frames, iterations=32):
+    """Parameter t of each bezier segment at which its x reaches frames, by bisection"""
+    low = np.zeros_like(frames)
+    high = np.ones_like(frames)
+    for _ in range(iterations):
+        t = (low + high) / 2
+        u = 1 - t
+        x = u * u * u * x0 + 3 * u * u * t * x1 + 3 * u * t * t * x2 + t * t * t * x3
+        below = x < frames
+        low = np.where(below, t, low)
+        high = np.where(below, high, t)
+
+    return (low + high) / 2
+
+
+def sample_fcurve(fcurve, frames):
+    """Evaluate fcurve at every frame of the frames array at once"""
+    frames = np.asarray(frames, dtype=np.float64)
+
+    count = len(fcurve.keyframe_points)
+    interpolation = np.zeros(count, dtype=np.int32)
+    fcurve.keyframe_points.foreach_get("interpolation", interpolation)
+
+    if not can_sample_fcurve(fcurve, interpolation):
+        return np.array([fcurve.evaluate(frame) for frame in frames])
+
+    co = np.zeros(count * 2)
+    handle_left = np.zeros(count * 2)
+    handle_right = np.zeros(count * 2)
+    fcurve.keyframe_points.foreach_get("co", co)
+    fcurve.keyframe_points.foreach_get("handle_left", handle_left)
+    fcurve.keyframe_points.foreach_get("handle_right", handle_right)
+    co = co.reshape(-1, 2)
+    handle_left = handle_left.reshape(-1, 2)
+    handle_right = handle_right.reshape(-1, 2)
+
+    # Keyframe each frame is after, frames outside the keyframes take the nearest value
+    index = np.clip(np.searchsorted(co[:, 0], frames, side="right") - 1, 0, count - 1)
+    values = co[index, 1].copy()
+
+    in_segment = (frames > co[0, 0]) & (index < count - 1)
+    start = index[in_segment]
+    end = start + 1
+    segment_frames = frames[in_segment]
+    segment_values = co[start, 1].copy()
+
+    linear = interpolation[start] == INTERPOLATION_LINEAR
+    if np.any(linear):
+        p0 = co[start[linear]]
+        p1 = co[end[linear]]
+        fac = (segment_frames[linear] - p0[:, 0]) / (p1[:, 0] - p0[:, 0])
+        segment_values[linear] = p0[:, 1] + (p1[:, 1] - p0[:, 1]) * fac
+
+    bezier = interpolation[start] == INTERPOLATION_BEZIER
+    if np.any(bezier):
+        p0 = co[start[bezier]]
+        p3 = co[end[bezier]]
+        h1 = p0 - handle_right[start[bezier]]
+        h2 = p3 - handle_left[end[bezier]]
+
+        # Same as Blender, scale down handles that would make the curve go back in time
+        length = p3[:, 0] - p0[:, 0]
+        handles_length = np.abs(h1[:, 0]) + np.abs(h2[:, 0])
+        fac = np.where(handles_length > length,
+                       length / np.where(handles_length > 0, handles_length, 1), 1)[:, None]
+        p1 = p0 - fac * h1
+        p2 = p3 - fac * h2
+
+        t = solve_bezier_segments(
+            p0[:, 0], p1[:, 0], p2[:, 0], p3[:, 0], segment_frames[bezier])
+        u = 1 - t
+        segment_values[bezier] = u * u * u * p0[:, 1] + 3 * u * u * t * p1[:, 1] + \
+            3 * u * t * t * p2[:, 1] + t * t * t * p3[:, 1]
+
+    values[in_segment] = segment_values
+
+    return values
+
+
+def sample_fcurves(fcurves, data_path, frames, count, defaults=0.0):
+    """Values of the count fcurves of data_path at every frame, as an array with a row per
+    frame. Components without an fcurve keep defaults, the default value of the property,
+    e.g. 1 for scale. Returns None if the data path is not animated."""
+    curves = [fcurves.find(data_path, index=index) for index in range(count)]
+    if all(curve is None for curve in curves):
+        return None
+
+    values = np.empty((len(frames), count))
+    values[:] = defaults
+    for index, curve in enumerate(curves):
+        if curve is not None:
+            values[:, index] = sample_fcurve(curve, frames)
+
+    return values
+
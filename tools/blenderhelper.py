@@ -86,6 +86,9 @@ def split_object(obj):
 def join_objects(objs):
     bpy.ops.object.select_all(action="DESELECT")
     bpy.context.view_layer.objects.active = objs[0]
+    # Joining modifies the active object's mesh, which may also be used by other objects
+    if objs[0].data.users > 1:
+        objs[0].data = objs[0].data.copy()
     meshes = []
     for obj in objs:
         meshes.append(obj.data)
@@ -93,9 +96,9 @@ def join_objects(objs):
     bpy.ops.object.join()
     bpy.ops.object.select_all(action="DESELECT")
     joined_obj = bpy.context.view_layer.objects.active
-    # Delete leftover meshes
+    # Delete leftover meshes, unless still used by other objects
     for mesh in meshes:
-        if mesh == joined_obj.data:
+        if mesh == joined_obj.data or mesh.users > 0:
             continue
         bpy.data.meshes.remove(mesh)
     return joined_obj
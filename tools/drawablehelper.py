@@ -73,7 +73,9 @@ def convert_selected_to_drawable(objs, use_names=False, multiple=False, do_cente
 
 
 def join_drawable_geometries(drawable):
-    join_objects(get_drawable_geometries(drawable))
+    geometries = get_drawable_geometries(drawable)
+    if len(geometries) > 1:
+        join_objects(geometries)
 
 
 def get_drawable_geometries(drawable):
@@ -182,3 +182,12 @@ def prop_array_to_vector(prop, size=3):
     if size == 4:
         return Quaternion((prop[0], prop[1], prop[2], prop[3]))
     return Vector((prop[0], prop[1], prop[2]))
+
+
+def run_steps(steps):
+    """Run a generator of import steps to completion and return its result"""
+    while True:
+        try:
+            next(steps)
+        except StopIteration as stop:
+            return stop.value
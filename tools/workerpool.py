@@ -0,0 +1,34 @@
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+
+def get_worker_count(limit):
+    """Number of worker processes to use, leaving one core for Blender."""
+    return max(1, min(limit, (os.cpu_count() or 1) - 1))
+
+
+def create_process_pool(max_workers):
+    # Spawned rather than forked, a forked copy of Blender is not safe to use
+    return ProcessPoolExecutor(max_workers=get_worker_count(max_workers),
+                               mp_context=multiprocessing.get_context("spawn"))
+
+
+def submit_prefetched(pool, function, items, depth):
+    """Submit function(item) to the pool for each item, keeping at most depth items
+    in flight. Yields (item, future) in the order of items."""
+    pending = deque()
+
+    try:
+        for item in items:
+            pending.append((item, pool.submit(function, item)))
+            if len(pending) >= depth:
+                yield pending.popleft()
+
+        while pending:
+            yield pending.popleft()
+    finally:
+        # Stopped early, don't leave the remaining items running
+        for _, future in pending:
+            future.cancel()
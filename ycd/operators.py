@@ -1,9 +1,12 @@
+import os
 import bpy
 
 from ..sollumz_helper import SOLLUMZ_OT_base
 from ..sollumz_properties import SollumType
 from ..tools.blenderhelper import find_child_by_type, get_armature_obj
-from .ycdimport import create_clip_dictionary_template, create_anim_obj
+from ..cwxml.clipsdictionary import YCD
+from .ycdimport import create_clip_dictionary_template, create_anim_obj, import_ycd_actions
+from .ycdexport import animation_cache
 
 
 class SOLLUMZ_OT_clip_apply_nla(SOLLUMZ_OT_base, bpy.types.Operator):
@@ -296,6 +299,89 @@ class SOLLUMZ_OT_animation_fill(SOLLUMZ_OT_base, bpy.types.Operator):
         return {"FINISHED"}
 
 
+class SOLLUMZ_OT_clear_animation_cache(SOLLUMZ_OT_base, bpy.types.Operator):
+    """Forget the animations cached by previous exports, so the next export encodes every animation again"""
+    bl_idname = "sollumz.clear_animation_cache"
+    bl_label = "Clear Animation Export Cache"
+
+    def run(self, context):
+        count = len(animation_cache.animations)
+        animation_cache.clear()
+        self.message(f"Cleared {count} cached animation(s).")
+
+        return {"FINISHED"}
+
+
+class SOLLUMZ_OT_import_ycd_actions(SOLLUMZ_OT_base, bpy.types.Operator):
+    """Import every YCD in a directory as actions for an armature, without creating clip dictionaries"""
+    bl_idname = "sollumz.import_ycd_actions"
+    bl_label = "Import YCD Directory as Actions"
+    bl_showtime = True
+
+    directory: bpy.props.StringProperty(
+        name="Directory",
+        description="Directory to import every clip dictionary from",
+        subtype="DIR_PATH",
+    )
+
+    armature: bpy.props.StringProperty(
+        name="Armature",
+        description="Name of the armature object the animations are for. Uses the active object if empty",
+        default="",
+    )
+
+    reduce_keyframes: bpy.props.BoolProperty(
+        name="Reduce Keyframes",
+        description="Only keep the keyframes needed to follow the animation within the tolerance, with linear interpolation between them.",
+        default=False,
+    )
+
+    keyframe_tolerance: bpy.props.FloatProperty(
+        name="Tolerance",
+        description="Maximum difference between a reduced curve and the animation's value at any frame.",
+        default=0.0001,
+        min=0,
+        precision=5,
+    )
+
+    parallel_animations: bpy.props.BoolProperty(
+        name="Parallel Decoding",
+        description="Decodes animations in background processes while the actions of the current one are created.",
+        default=False,
+    )
+
+    def invoke(self, context, event):
+        context.window_manager.fileselect_add(self)
+        return {"RUNNING_MODAL"}
+
+    def run(self, context):
+        armature_obj = bpy.data.objects.get(
+            self.armature) if self.armature else context.active_object
+        if armature_obj is None or armature_obj.type != "ARMATURE":
+            self.error("No target armature, select one or set the armature name.")
+            return False
+
+        filepaths = sorted(os.path.join(self.directory, file) for file in os.listdir(self.directory)
+                           if file.endswith(YCD.file_extension))
+        if len(filepaths) < 1:
+            self.warning(f"No {YCD.file_extension} files found in {self.directory}")
+            return False
+
+        actions, missing_bone_tags = import_ycd_actions(
+            filepaths, armature_obj, self.keyframe_tolerance if self.reduce_keyframes else None, self.parallel_animations)
+
+        for filepath, bone_tags in missing_bone_tags.items():
+            self.warning(
+                f"{os.path.basename(filepath)} animates bones missing from {armature_obj.name}: {', '.join(str(tag) for tag in sorted(bone_tags))}")
+
+        action_count = sum(len(file_actions)
+                           for file_actions in actions.values())
+        self.message(
+            f"Imported {action_count} action(s) from {len(filepaths)} file(s).")
+
+        return True
+
+
 class SOLLUMZ_OT_create_uv_anim_node(SOLLUMZ_OT_base, bpy.types.Operator):
     bl_idname = "sollumz.create_uv_anim_node"
     bl_label = "Add UV node to material"
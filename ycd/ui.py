@@ -138,6 +138,7 @@ class SOLLUMZ_PT_UV_ANIMATION_ACTIONS(bpy.types.Panel):
         obj = context.active_object
         layout = self.layout
         layout.prop(obj.uv_anim_materials, "material")
+        layout.prop(obj.animation_properties, "base_action")
 
 
 class SOLLUMZ_PT_ANIMATIONS_TOOL_PANEL(bpy.types.Panel):
@@ -174,6 +175,9 @@ class SOLLUMZ_PT_ANIMATIONS_TOOL_PANEL(bpy.types.Panel):
                 if active_object.sollum_type == SollumType.ANIMATION:
                     layout.operator(
                         ycd_ops.SOLLUMZ_OT_animation_fill.bl_idname)
+
+                layout.operator(
+                    ycd_ops.SOLLUMZ_OT_clear_animation_cache.bl_idname)
             else:
                 row = layout.row(align=False)
                 row.operator(
@@ -182,6 +186,10 @@ class SOLLUMZ_PT_ANIMATIONS_TOOL_PANEL(bpy.types.Panel):
                 row = layout.row()
                 row.operator(
                     ycd_ops.SOLLUMZ_OT_create_uv_anim_node.bl_idname)
+
+                if active_object.type == "ARMATURE":
+                    layout.operator(
+                        ycd_ops.SOLLUMZ_OT_import_ycd_actions.bl_idname)
         else:
             layout.operator(
                 ycd_ops.SOLLUMZ_OT_create_clip_dictionary.bl_idname)
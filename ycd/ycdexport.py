@@ -1,20 +1,34 @@
 import bpy
+import hashlib
+import numpy as np
+from xml.etree import ElementTree as ET
 from bpy.types import PoseBone
-from mathutils import Vector, Matrix, Quaternion
+from mathutils import Vector, Quaternion
 
 from ..cwxml import clipsdictionary as ycdxml
+from ..cwxml.animcodec import (
+    TrackEncoder,
+    encode_animation,
+    locations_from_pose,
+    rotations_from_pose,
+    make_hemisphere_continuous
+)
 from ..sollumz_properties import SollumType
 from ..tools.jenkhash import Generate
 from ..tools.blenderhelper import build_name_bone_map, build_bone_map, get_armature_obj
+from ..tools.workerpool import create_process_pool
 from ..tools.animationhelper import (
     TrackType,
     ActionType,
     AnimationFlag,
-    evaluate_vector,
-    evaluate_quaternion,
-    evaluate_euler_to_quaternion,
-    get_quantum_and_min_val,
+    sample_fcurves,
+    QUATERNION_DEFAULTS,
+    SCALE_DEFAULTS,
+    euler_to_quaternion,
+    get_rest_transform,
+    build_rest_transforms,
     is_ped_bone_tag,
+    get_uv_vector_math_node,
     TrackTypeValueMap,
 )
 
@@ -38,7 +52,18 @@ def ensure_action_track(track_type: TrackType, action_type: ActionType):
     return track_type
 
 
-def sequence_items_from_action(action, sequence_items, action_data, action_type, frame_count, animation_type):
+def get_uv_action(animation_obj):
+    """Action of a UV animation: its base action, else the one its material's node tree plays"""
+    if animation_obj.animation_properties.base_action is not None:
+        return animation_obj.animation_properties.base_action
+
+    material = animation_obj.uv_anim_materials.material
+    animation_data = material.node_tree.animation_data if material else None
+    return animation_data.action if animation_data else None
+
+
+def sequence_items_from_action(action, sequence_items, action_data, action_type, frames, animation_type, rest_transforms=None):
+    """Sequence items of the tracks of action, sampled at each of the frames array"""
     if animation_type == "REGULAR":
         print("Craeting sequence item from action for REGULAR")
 
@@ -47,6 +72,10 @@ def sequence_items_from_action(action, sequence_items, action_data, action_type,
         scales_map = {}
         bones_map = action_data
 
+        if rest_transforms is None:
+            rest_transforms = {p_bone.name: get_rest_transform(
+                p_bone) for p_bone in bones_map.values()}
+
         p_bone: PoseBone
         for parent_tag, p_bone in bones_map.items():
             pos_vector_path = p_bone.path_from_id("location")
@@ -54,98 +83,63 @@ def sequence_items_from_action(action, sequence_items, action_data, action_type,
             rot_euler_path = p_bone.path_from_id("rotation_euler")
             scale_vector_path = p_bone.path_from_id("scale")
 
-            # Get list of per-frame data for every path
+            # Get arrays of per-frame data for every path
+
+            b_locations = sample_fcurves(
+                action.fcurves, pos_vector_path, frames, 3)
+            b_quaternions = sample_fcurves(
+                action.fcurves, rot_quaternion_path, frames, 4, QUATERNION_DEFAULTS)
+            b_eulers = sample_fcurves(
+                action.fcurves, rot_euler_path, frames, 3)
+            b_scales = sample_fcurves(
+                action.fcurves, scale_vector_path, frames, 3, SCALE_DEFAULTS)
 
-            b_locations = evaluate_vector(
-                action.fcurves, pos_vector_path, frame_count)
-            b_quaternions = evaluate_quaternion(
-                action.fcurves, rot_quaternion_path, frame_count)
-            b_euler_quaternions = evaluate_euler_to_quaternion(
-                action.fcurves, rot_euler_path, frame_count)
-            b_scales = evaluate_vector(
-                action.fcurves, scale_vector_path, frame_count)
+            rest_transform = rest_transforms[p_bone.name]
 
-            # Link them with Bone ID
+            # Transform position from local to armature space
+            if b_locations is not None:
+                if p_bone.bone.parent is not None:
+                    b_locations = locations_from_pose(
+                        b_locations, rest_transform)
 
-            if len(b_locations) > 0:
                 locations_map[parent_tag] = b_locations
 
             # Its a bit of a edge case scenario because blender uses either
             # euler or quaternion (I cant really understand why quaternion doesnt update with euler)
             # So we will prefer quaternion over euler for now
             # TODO: Theres also third rotation in blender, angles or something...
-            if len(b_quaternions) > 0:
-                rotations_map[parent_tag] = b_quaternions
-            elif len(b_euler_quaternions) > 0:
-                rotations_map[parent_tag] = b_euler_quaternions
-
-            if len(b_scales) > 0:
+            if b_quaternions is None and b_eulers is not None:
+                b_quaternions = euler_to_quaternion(b_eulers)
+
+            # Transform rotation from local to armature space
+            if b_quaternions is not None:
+                # "Flickering bug" fix - killso:
+                # This bug is caused by interpolation algorithm used in GTA
+                # which is not slerp, but straight interpolation of every value
+                # and this leads to incorrect results in cases if dot(this, next) < 0
+                # This is correct "Quaternion Lerp" algorithm:
+                # if (Dot(start, end) >= 0f)
+                # {
+                #   result.X = (1 - amount) * start.X + amount * end.X
+                #   ...
+                # }
+                # else
+                # {
+                #   result.X = (1 - amount) * start.X - amount * end.X
+                #   ...
+                # }
+                # (Statement difference is only substracting instead of adding)
+                # But GTA algorithm doesn't have Dot check,
+                # resulting all values that are not passing this statement to "lag" in game.
+                # (because of incorrect interpolation direction)
+                # So what we do is make all values to pass Dot(start, end) >= 0f statement
+                rotations_map[parent_tag] = make_hemisphere_continuous(
+                    rotations_from_pose(b_quaternions, rest_transform))
+                # WARNING: ANY OPERATION WITH ROTATION WILL CAUSE SIGN CHANGE. PROCEED ANYTHING BEFORE FIX.
+
+            if b_scales is not None:
                 scales_map[parent_tag] = b_scales
 
-        # Transform position from local to armature space
-        for parent_tag, positions in locations_map.items():
-            p_bone = bones_map[parent_tag]
-            bone = p_bone.bone
-
-            for frame_id, position in enumerate(positions):
-                mat = bone.matrix_local
-
-                if bone.parent is not None:
-                    mat = bone.parent.matrix_local.inverted() @ bone.matrix_local
-
-                    mat_decomposed = mat.decompose()
-
-                    bone_location = mat_decomposed[0]
-                    bone_rotation = mat_decomposed[1]
-
-                    position.rotate(bone_rotation)
-
-                    diff_location = Vector((
-                        (position.x + bone_location.x),
-                        (position.y + bone_location.y),
-                        (position.z + bone_location.z),
-                    ))
-
-                    positions[frame_id] = diff_location
-
-        # Transform rotation from local to armature space
-        for parent_tag, quaternions in rotations_map.items():
-            p_bone = bones_map[parent_tag]
-            bone = p_bone.bone
-
-            prev_quaternion = None
-            for quaternion in quaternions:
-                if p_bone.parent is not None:
-                    pose_rot = Matrix.to_quaternion(bone.matrix)
-                    quaternion.rotate(pose_rot)
-
-                if prev_quaternion is not None:
-                    # "Flickering bug" fix - killso:
-                    # This bug is caused by interpolation algorithm used in GTA
-                    # which is not slerp, but straight interpolation of every value
-                    # and this leads to incorrect results in cases if dot(this, next) < 0
-                    # This is correct "Quaternion Lerp" algorithm:
-                    # if (Dot(start, end) >= 0f)
-                    # {
-                    #   result.X = (1 - amount) * start.X + amount * end.X
-                    #   ...
-                    # }
-                    # else
-                    # {
-                    #   result.X = (1 - amount) * start.X - amount * end.X
-                    #   ...
-                    # }
-                    # (Statement difference is only substracting instead of adding)
-                    # But GTA algorithm doesn't have Dot check,
-                    # resulting all values that are not passing this statement to "lag" in game.
-                    # (because of incorrect interpolation direction)
-                    # So what we do is make all values to pass Dot(start, end) >= 0f statement
-                    if Quaternion.dot(prev_quaternion, quaternion) < 0:
-                        quaternion *= -1
-
-                prev_quaternion = quaternion
-        # WARNING: ANY OPERATION WITH ROTATION WILL CAUSE SIGN CHANGE. PROCEED ANYTHING BEFORE FIX.
-
         if len(locations_map) > 0:
             sequence_items[ensure_action_track(
                 TrackType.BonePosition, action_type)] = locations_map
@@ -163,28 +157,19 @@ def sequence_items_from_action(action, sequence_items, action_data, action_type,
         u_locations_map = {}
         v_locations_map = {}
         uv_mat = action
-        uv_nodetree = uv_mat.node_tree
-        mat_nodes = uv_nodetree.nodes
-        vector_math_node = None
 
         # Verify if material has required node(Vector Math) to get animation data
-        for node in mat_nodes:
-            if node.type == 'VECT_MATH':
-                vector_math_node = node
-                break
+        vector_math_node = get_uv_vector_math_node(uv_mat)
         if vector_math_node is None:
             raise Exception("Unable to find Vector Math node in material to get UV animation data!")
         else:
             pos_vector_path = vector_math_node.inputs[1].path_from_id("default_value")
-            uv_fcurve = uv_nodetree.animation_data.action.fcurves
-            uv_locations = evaluate_vector(
-                    uv_fcurve, pos_vector_path, frame_count)
-            if len(uv_locations) > 0:
-                u_channel_loc = []
-                v_channel_loc = []
-                for vector in uv_locations:
-                    u_channel_loc.append(round(vector.x, 4))
-                    v_channel_loc.append(-round(vector.y, 4))
+            uv_action = get_uv_action(action_data)
+            uv_locations = sample_fcurves(
+                uv_action.fcurves, pos_vector_path, frames, 3) if uv_action else None
+            if uv_locations is not None:
+                u_channel_loc = np.round(uv_locations[:, 0], 4).tolist()
+                v_channel_loc = (-np.round(uv_locations[:, 1], 4)).tolist()
 
                 if len(u_channel_loc) > 0:
                         u_locations_map[0] = u_channel_loc
@@ -201,150 +186,140 @@ def sequence_items_from_action(action, sequence_items, action_data, action_type,
                     TrackType.UV1, action_type)] = v_locations_map
 
 
-def build_values_channel(values, uniq_values, indirect_percentage=0.1):
-    values_len_percentage = len(uniq_values) / len(values)
+def get_shared_values(values, values_cache):
+    """Values as a float32 array, shared with the channels of the sequence that have the same values"""
+    if values_cache is None:
+        return values.astype(np.float32)
 
-    if len(uniq_values) == 1:
-        channel = ycdxml.ChannelsListProperty.StaticFloat()
+    key = values.tobytes()
+    if key not in values_cache:
+        values_cache[key] = values.astype(np.float32)
 
-        channel.value = uniq_values[0]
-    elif values_len_percentage <= indirect_percentage:
-        channel = ycdxml.ChannelsListProperty.IndirectQuantizeFloat()
+    return values_cache[key]
 
-        min_value, quantum = get_quantum_and_min_val(uniq_values)
 
-        channel.values = uniq_values
-        channel.offset = min_value
-        channel.quantum = quantum
+def channel_from_data(data, values_cache=None):
+    """Channel element of the channel data built by a TrackEncoder"""
+    channel = getattr(ycdxml.ChannelsListProperty, data.type)()
 
-        for value in values:
-            channel.frames.append(uniq_values.index(value))
+    if data.type == "StaticVector3":
+        channel.value = Vector(data.value) if isinstance(
+            data.value, tuple) else data.value
+    elif data.type == "StaticQuaternion":
+        channel.value = Quaternion(data.value)
+    elif data.type == "StaticFloat":
+        channel.value = data.value
+    elif data.type == "CachedQuaternion1":
+        channel.quat_index = data.quat_index
     else:
-        channel = ycdxml.ChannelsListProperty.QuantizeFloat()
+        channel.values = get_shared_values(
+            np.asarray(data.values), values_cache)
+        if data.type != "RawFloat":
+            channel.offset = data.offset
+            channel.quantum = data.quantum
 
-        min_value, quantum = get_quantum_and_min_val(values)
-
-        channel.values = values
-        channel.offset = min_value
-        channel.quantum = quantum
+        if data.type == "IndirectQuantizeFloat":
+            channel.frames = data.frames
 
     return channel
 
 
-def sequence_item_from_frames_data(track, frames_data):
-    sequence_data = ycdxml.Animation.SequenceDataListProperty.SequenceData()
-
-    # TODO: Would be good to put this in enum
+def sequence_from_channels(sequence_channels, frame_count, sequence_index):
+    sequence = ycdxml.Animation.SequenceListProperty.Sequence()
+    sequence.frame_count = frame_count
+    sequence.hash = "hash_" + hex(sequence_index)[2:].zfill(8)
 
-    # Location, Scale, RootMotion Position
-    if track == 0 or track == 2 or track == 5:
-        values_x = []
-        values_y = []
-        values_z = []
+    values_cache = {}
+    for channels in sequence_channels:
+        sequence_data = ycdxml.Animation.SequenceDataListProperty.SequenceData()
+        for data in channels:
+            sequence_data.channels.append(
+                channel_from_data(data, values_cache))
+        sequence.sequence_data.append(sequence_data)
 
-        for vector in frames_data:
-            values_x.append(vector.x)
-            values_y.append(vector.y)
-            values_z.append(vector.z)
+    return sequence
 
-        uniq_x = list(set(values_x))
-        len_uniq_x = len(uniq_x)
 
-        uniq_y = list(set(values_y))
-        len_uniq_y = len(uniq_y)
+class AnimationSampling:
+    """Frames of an animation's actions sampled on export, at the export frame rate and
+    within the export frame range if set"""
 
-        uniq_z = list(set(values_z))
-        len_uniq_z = len(uniq_z)
+    def __init__(self, frame_count, export_settings=None):
+        self.source_fps = bpy.context.scene.render.fps
+        self.fps = self.source_fps
+        self.start = 0
+        self.end = frame_count - 1
+        self.is_limited = False
 
-        if len_uniq_x == 1 and len_uniq_y == 1 and len_uniq_z == 1:
-            channel = ycdxml.ChannelsListProperty.StaticVector3()
-            channel.value = frames_data[0]
+        if export_settings is not None and export_settings.limit_frame_range:
+            self.start = min(max(export_settings.frame_range_start, 0), self.end)
+            self.end = max(min(export_settings.frame_range_end, self.end), self.start)
+            self.is_limited = True
 
-            sequence_data.channels.append(channel)
-        else:
-            sequence_data.channels.append(
-                build_values_channel(values_x, uniq_x))
-            sequence_data.channels.append(
-                build_values_channel(values_y, uniq_y))
-            sequence_data.channels.append(
-                build_values_channel(values_z, uniq_z))
-    # Rotation, RootMotion Rotation
-    elif track == 1 or track == 6:
-        values_x = []
-        values_y = []
-        values_z = []
-        values_w = []
+        if export_settings is not None and export_settings.resample_animations:
+            self.fps = export_settings.animation_fps
 
-        for vector in frames_data:
-            values_x.append(vector.x)
-            values_y.append(vector.y)
-            values_z.append(vector.z)
-            values_w.append(vector.w)
+        # Actions are sampled between their frames, fcurves interpolate the same as in Blender.
+        # Samples are spread evenly over the range, the closest to the export frame rate that fits it.
+        step = self.source_fps / self.fps
+        count = int(round((self.end - self.start) / step)) + 1
+        self.frames = np.linspace(self.start, self.end, max(count, 1))
 
-        uniq_x = list(set(values_x))
-        len_uniq_x = len(uniq_x)
+    @property
+    def frame_count(self):
+        return len(self.frames)
 
-        uniq_y = list(set(values_y))
-        len_uniq_y = len(uniq_y)
+    @property
+    def duration(self):
+        return (self.end - self.start) / self.source_fps
 
-        uniq_z = list(set(values_z))
-        len_uniq_z = len(uniq_z)
+    def get_time(self, frame):
+        """Time in the exported animation of a frame of its actions"""
+        time = (frame - self.start) / self.source_fps
+        if self.is_limited:
+            time = min(max(time, 0), (self.end - self.start) / self.source_fps)
 
-        uniq_w = list(set(values_w))
-        len_uniq_w = len(uniq_w)
+        return time
 
-        if len_uniq_x == 1 and len_uniq_y == 1 and len_uniq_z == 1 and len_uniq_w == 1:
-            channel = ycdxml.ChannelsListProperty.StaticQuaternion()
-            channel.value = frames_data[0]
+    def get_clip_times(self, start_frame, end_frame):
+        """Start and end time of a clip playing start_frame to end_frame of the actions, and
+        the part of it that is kept within the frame range"""
+        start_time = self.get_time(start_frame)
+        end_time = self.get_time(end_frame)
+        source_duration = (end_frame - start_frame) / self.source_fps
 
-            sequence_data.channels.append(channel)
-        else:
-            sequence_data.channels.append(
-                build_values_channel(values_x, uniq_x))
-            sequence_data.channels.append(
-                build_values_channel(values_y, uniq_y))
-            sequence_data.channels.append(
-                build_values_channel(values_z, uniq_z))
-            sequence_data.channels.append(
-                build_values_channel(values_w, uniq_w))
-    # UV0/U or UV1/V
-    elif track == 17 or track == 18:
-        len_uniq_uv = len(frames_data)
+        kept = 1.0
+        if self.is_limited and source_duration > 0:
+            kept = (end_time - start_time) / source_duration
 
-        if len_uniq_uv == 1:
-            channel = ycdxml.ChannelsListProperty.StaticVector3()
-            channel.value = frames_data[0]
+        return start_time, end_time, kept
 
-            sequence_data.channels.append(channel)
-        else:
-            channel1 = ycdxml.ChannelsListProperty.StaticFloat()
-            channel2 = ycdxml.ChannelsListProperty.StaticFloat()
-            if track == 17:
-                channel1.value = 1
-                channel2.value = 0
-            elif track == 18:
-                channel1.value = 0
-                channel2.value = 1
-            sequence_data.channels.append(channel1)
-            sequence_data.channels.append(channel2)
-            # Main channel item which contains frame data
-            sequence_data.channels.append(
-                build_values_channel(frames_data, list(set(frames_data))))
 
+def get_sequence_ranges(frame_count, sequence_frame_limit):
+    """Start and end of the frames of each sequence. Sequences start every sequence_frame_limit
+    frames, and also hold the first frame of the next one to interpolate towards it."""
+    if frame_count <= sequence_frame_limit + 1:
+        return [(0, frame_count)]
 
-    return sequence_data
+    return [(start, min(start + sequence_frame_limit + 1, frame_count))
+            for start in range(0, frame_count - 1, sequence_frame_limit)]
 
 
-def animation_from_object(animation_obj, bones_name_map, bones_map, is_ped_animation, animation_type):
+def animation_from_object(animation_obj, bones_name_map, bones_map, is_ped_animation, animation_type, export_settings=None, rest_transforms=None, sampling=None):
+    """Animation header and bone ids of animation_obj, with the sampled values of each of its
+    tracks and the frames of each sequence. Sequences are added by add_sequences_to_animation."""
     animation = ycdxml.Animation()
 
     animation_properties = animation_obj.animation_properties
-    frame_count = animation_properties.frame_count
+    if sampling is None:
+        sampling = AnimationSampling(
+            animation_properties.frame_count, export_settings)
+    frame_count = sampling.frame_count
 
     animation.hash = animation_properties.hash
     animation.frame_count = frame_count
     animation.sequence_frame_limit = frame_count + 30
-    animation.duration = (frame_count - 1) / bpy.context.scene.render.fps
+    animation.duration = sampling.duration
     animation.unknown10 = AnimationFlag.Default
 
     # This value must be unique (Looks like its used internally for animation caching)
@@ -358,7 +333,7 @@ def animation_from_object(animation_obj, bones_name_map, bones_map, is_ped_anima
             action = animation_properties.base_action
             action_type = ActionType.Base
             sequence_items_from_action(
-                action, sequence_items, bones_map, action_type, frame_count, animation_type)
+                action, sequence_items, bones_map, action_type, sampling.frames, animation_type, rest_transforms)
 
         if animation_properties.root_motion_location_action:
             action = animation_properties.root_motion_location_action
@@ -366,7 +341,7 @@ def animation_from_object(animation_obj, bones_name_map, bones_map, is_ped_anima
 
             animation.unknown10 |= AnimationFlag.RootMotion
             sequence_items_from_action(
-                action, sequence_items, bones_map, action_type, frame_count, animation_type)
+                action, sequence_items, bones_map, action_type, sampling.frames, animation_type, rest_transforms)
 
         # TODO: Figure out root motion rotation
         # if animation_properties.root_motion_rotation_action:
@@ -381,35 +356,209 @@ def animation_from_object(animation_obj, bones_name_map, bones_map, is_ped_anima
         action_material = animation_obj.uv_anim_materials.material
         action_type = ActionType.Base
         sequence_items_from_action(
-            action_material, sequence_items, animation_obj, action_type, frame_count, animation_type)
+            action_material, sequence_items, animation_obj, action_type, sampling.frames, animation_type)
 
-    sequence = ycdxml.Animation.SequenceListProperty.Sequence()
-    sequence.frame_count = frame_count
-    sequence.hash = "hash_" + hex(0)[2:].zfill(8)
+    sequence_frame_limit = export_settings.sequence_frame_limit if export_settings else frame_count
+
+    sequence_ranges = get_sequence_ranges(frame_count, sequence_frame_limit)
+    if len(sequence_ranges) > 1:
+        animation.sequence_frame_limit = sequence_frame_limit
 
+    tracks = []
     for track, bones_data in sorted(sequence_items.items()):
         for bone_id, frames_data in sorted(bones_data.items()):
-            sequence_data = sequence_item_from_frames_data(track, frames_data)
-
             seq_bone_id = ycdxml.Animation.BoneIdListProperty.BoneId()
             seq_bone_id.bone_id = bone_id
             seq_bone_id.track = track.value
             seq_bone_id.unk0 = TrackTypeValueMap[track].value
             animation.bone_ids.append(seq_bone_id)
 
-            sequence.sequence_data.append(sequence_data)
-
-    animation.sequences.append(sequence)
+            tracks.append(
+                (track.value, np.array(frames_data, dtype=np.float64)))
 
     # Get int value from enum, a bit junky...
     animation.unknown10 = animation.unknown10.value
 
-    return animation
+    return animation, tracks, sequence_ranges
+
+
+def add_sequences_to_animation(animation, sequences, sequence_ranges):
+    # Each sequence is compressed on its own, so parts of a track that do not move are static
+    for sequence_index, (sequence_channels, (start, end)) in enumerate(zip(sequences, sequence_ranges)):
+        animation.sequences.append(sequence_from_channels(
+            sequence_channels, end - start, sequence_index))
+
+
+def encode_animations(animations_data, encoder, parallel=True):
+    """Channels of each sampled animation, encoded in worker processes if parallel. Returns
+    the sequences of each animation with an encoder holding what was encoded for it."""
+    def get_encoder():
+        return TrackEncoder(encoder.quaternion_mode, encoder.max_position_error, encoder.max_rotation_error)
+
+    if not parallel or len(animations_data) < 2:
+        return [encode_animation(tracks, sequence_ranges, get_encoder()) for _, tracks, sequence_ranges in animations_data]
+
+    with create_process_pool(len(animations_data)) as pool:
+        futures = [pool.submit(encode_animation, tracks, sequence_ranges, get_encoder())
+                   for _, tracks, sequence_ranges in animations_data]
+
+        return [future.result() for future in futures]
+
+
+def get_struct_values(struct):
+    """Values of every property of a Blender struct, and of the items of its collections"""
+    values = []
+    for prop in struct.bl_rna.properties:
+        if prop.type == "POINTER":
+            continue
+
+        value = getattr(struct, prop.identifier)
+        if prop.type == "COLLECTION":
+            value = [get_struct_values(item) for item in value]
+        elif isinstance(value, set):
+            value = sorted(value)
+        elif not isinstance(value, (bool, int, float, str)):
+            value = tuple(value)
+
+        values.append((prop.identifier, value))
+
+    return values
+
+
+def update_fcurves_digest(digest, fcurves):
+    """Add everything fcurves are sampled from to digest. Returns False if they depend on
+    more than that, i.e. on drivers, and can not be cached."""
+    for fcurve in sorted(fcurves, key=lambda fcurve: (fcurve.data_path, fcurve.array_index)):
+        if getattr(fcurve, "driver", None) is not None:
+            return False
+
+        count = len(fcurve.keyframe_points)
+        keyframes = np.zeros(count * 9)
+        enums = np.zeros(count * 2, dtype=np.int32)
+        fcurve.keyframe_points.foreach_get("co", keyframes[:count * 2])
+        fcurve.keyframe_points.foreach_get(
+            "handle_left", keyframes[count * 2:count * 4])
+        fcurve.keyframe_points.foreach_get(
+            "handle_right", keyframes[count * 4:count * 6])
+        fcurve.keyframe_points.foreach_get("back", keyframes[count * 6:count * 7])
+        fcurve.keyframe_points.foreach_get(
+            "amplitude", keyframes[count * 7:count * 8])
+        fcurve.keyframe_points.foreach_get("period", keyframes[count * 8:])
+        fcurve.keyframe_points.foreach_get("interpolation", enums[:count])
+        fcurve.keyframe_points.foreach_get("easing", enums[count:])
+
+        digest.update(repr((fcurve.data_path, fcurve.array_index, fcurve.extrapolation, fcurve.mute,
+                            [get_struct_values(modifier) for modifier in fcurve.modifiers])).encode())
+        digest.update(keyframes.tobytes())
+        digest.update(enums.tobytes())
 
+    return True
 
-def clip_from_object(clip_obj):
+
+def get_rest_pose_digest(bones_map):
+    """Digest of the rest pose of the bones animations are exported relative to"""
+    digest = hashlib.blake2b(digest_size=16)
+    if bones_map is None:
+        return digest.digest()
+
+    for tag, p_bone in sorted(bones_map.items()):
+        bone = p_bone.bone
+        digest.update(repr((tag, bone.name, bone.parent.name if bone.parent else None)).encode())
+        digest.update(np.array(bone.matrix_local).tobytes())
+        digest.update(np.array(bone.matrix).tobytes())
+
+    return digest.digest()
+
+
+def get_animation_digest(animation_obj, animation_type, rest_pose_digest, export_settings=None):
+    """Digest of everything an animation is exported from: its actions' fcurves, the rest
+    pose of the armature and the export settings. Returns None if it can not be cached."""
+    animation_properties = animation_obj.animation_properties
+
+    digest = hashlib.blake2b(rest_pose_digest, digest_size=16)
+    digest.update(repr((animation_type, animation_properties.hash, animation_properties.frame_count,
+                        bpy.context.scene.render.fps)).encode())
+
+    if export_settings is not None:
+        digest.update(repr((export_settings.sequence_frame_limit, export_settings.quaternion_channels,
+                            export_settings.compress_animations, export_settings.max_position_error,
+                            export_settings.max_rotation_error, export_settings.resample_animations,
+                            export_settings.animation_fps, export_settings.limit_frame_range,
+                            export_settings.frame_range_start, export_settings.frame_range_end)).encode())
+
+    if animation_type == "REGULAR":
+        actions = (animation_properties.base_action,
+                   animation_properties.root_motion_location_action)
+    else:
+        actions = (get_uv_action(animation_obj),)
+
+    for action in actions:
+        digest.update(repr(action.name if action else None).encode())
+        if action is not None and not update_fcurves_digest(digest, action.fcurves):
+            return None
+
+    return digest.digest()
+
+
+class AnimationCache:
+    """Animations serialized by previous exports, by the name of their object. Reused as
+    long as the digest of everything they were built from stays the same."""
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.animations = {}
+        self.hit_count = 0
+
+    def get(self, name, digest):
+        """Serialized animation and the encoder that built it, or None if it has changed since"""
+        if digest is None or name not in self.animations:
+            return None
+
+        cached_digest, fragment, encoder = self.animations[name]
+        if cached_digest != digest:
+            return None
+
+        self.hit_count += 1
+        return fragment, encoder
+
+    def add(self, name, digest, fragment, encoder):
+        if digest is None:
+            self.animations.pop(name, None)
+            return
+
+        self.animations[name] = (digest, fragment, encoder)
+
+
+animation_cache = AnimationCache()
+
+
+def get_animation_content_digest(fragment):
+    """Digest of a serialized animation, leaving out its hash and cache id so identical
+    animations under different names have the same digest"""
+    digest = hashlib.blake2b(digest_size=16)
+    for child in ET.fromstring(fragment):
+        if child.tag not in ("Hash", "Unknown1C"):
+            digest.update(ET.tostring(child))
+
+    return digest.digest()
+
+
+def clip_from_object(clip_obj, shared_hashes=None, samplings=None):
+    """Clip of clip_obj, referencing animations by the hash shared_hashes maps them to if any.
+    Times are those of the animations as sampled by samplings, by animation object name."""
+    shared_hashes = shared_hashes or {}
+    samplings = samplings or {}
     clip_properties = clip_obj.clip_properties
 
+    def get_sampling(animation_obj):
+        if animation_obj.name not in samplings:
+            samplings[animation_obj.name] = AnimationSampling(
+                animation_obj.animation_properties.frame_count)
+
+        return samplings[animation_obj.name]
+
     is_single_animation = len(clip_properties.animations) == 1
 
     if is_single_animation:
@@ -417,35 +566,36 @@ def clip_from_object(clip_obj):
         clip_animation_property = clip_properties.animations[0]
         animation_properties = clip_animation_property.animation.animation_properties
 
-        animation_duration = animation_properties.frame_count / bpy.context.scene.render.fps
-
-        clip.animation_hash = animation_properties.hash
-        clip.start_time = (clip_animation_property.start_frame /
-                           animation_properties.frame_count) * animation_duration
-        clip.end_time = (clip_animation_property.end_frame /
-                         animation_properties.frame_count) * animation_duration
+        clip.animation_hash = shared_hashes.get(
+            animation_properties.hash, animation_properties.hash)
+        clip.start_time, clip.end_time, kept = get_sampling(clip_animation_property.animation).get_clip_times(
+            clip_animation_property.start_frame, clip_animation_property.end_frame)
 
+        # Cut down with the frame range, playing at the same rate
         clip_animation_duration = clip.end_time - clip.start_time
-        clip.rate = clip_animation_duration / clip_properties.duration
+        clip.rate = clip_animation_duration / (clip_properties.duration * kept)
     else:
         clip = ycdxml.ClipsListProperty.ClipAnimationList()
-        clip.duration = clip_properties.duration
 
+        clip_animations = []
         for clip_animation_property in clip_properties.animations:
             clip_animation = ycdxml.ClipAnimationsListProperty.ClipAnimation()
 
             animation_properties = clip_animation_property.animation.animation_properties
 
-            animation_duration = animation_properties.frame_count / bpy.context.scene.render.fps
+            clip_animation.animation_hash = shared_hashes.get(
+                animation_properties.hash, animation_properties.hash)
+            clip_animation.start_time, clip_animation.end_time, kept = get_sampling(clip_animation_property.animation).get_clip_times(
+                clip_animation_property.start_frame, clip_animation_property.end_frame)
 
-            clip_animation.animation_hash = animation_properties.hash
-            clip_animation.start_time = (
-                clip_animation_property.start_frame / animation_properties.frame_count) * animation_duration
-            clip_animation.end_time = (
-                clip_animation_property.end_frame / animation_properties.frame_count) * animation_duration
+            clip_animations.append((clip_animation, kept))
 
+        clip.duration = clip_properties.duration * \
+            max((kept for _, kept in clip_animations), default=1.0)
+
+        for clip_animation, _ in clip_animations:
             clip_animation_duration = clip_animation.end_time - clip_animation.start_time
-            clip_animation.rate = clip_animation_duration / clip_properties.duration
+            clip_animation.rate = clip_animation_duration / clip.duration
 
             clip.animations.append(clip_animation)
 
@@ -456,7 +606,7 @@ def clip_from_object(clip_obj):
     return clip
 
 
-def clip_dictionary_from_object(exportop, obj, exportpath, export_settings=None):
+def clip_dictionary_from_object(exportop, obj, exportpath, export_settings=None, encoder=None):
     clip_dictionary = ycdxml.ClipsDictionary()
 
     armature = obj.clip_dict_properties.armature
@@ -474,6 +624,7 @@ def clip_dictionary_from_object(exportop, obj, exportpath, export_settings=None)
         print("Trying to export regular animation")
         bones_name_map = build_name_bone_map(armature_obj)
         bones_map = build_bone_map(armature_obj)
+        rest_transforms = build_rest_transforms(armature_obj)
 
         is_ped_animation = False
 
@@ -485,6 +636,7 @@ def clip_dictionary_from_object(exportop, obj, exportpath, export_settings=None)
         print("Exporting UV animation...")
         bones_name_map = None
         bones_map = None
+        rest_transforms = None
         is_ped_animation = False
 
     animations_obj = None
@@ -496,14 +648,72 @@ def clip_dictionary_from_object(exportop, obj, exportpath, export_settings=None)
         elif child_obj.sollum_type == SollumType.CLIPS:
             clips_obj = child_obj
 
+    if encoder is None:
+        encoder = TrackEncoder()
+    use_cache = export_settings.use_animation_cache if export_settings else False
+    rest_pose_digest = get_rest_pose_digest(bones_map) if use_cache else None
+
+    samplings = {animation_obj.name: AnimationSampling(animation_obj.animation_properties.frame_count, export_settings)
+                 for animation_obj in animations_obj.children}
+
+    animations = {}
+    changed_objs = []
+    for animation_obj in animations_obj.children:
+        digest = get_animation_digest(
+            animation_obj, animation_type, rest_pose_digest, export_settings) if use_cache else None
+        cached = animation_cache.get(
+            animation_obj.name, digest) if use_cache else None
+
+        if cached is None:
+            changed_objs.append((animation_obj, digest))
+        else:
+            animations[animation_obj.name] = cached
+
+    # Fcurves of changed animations are sampled here, their channels are then encoded independently
+    animations_data = [animation_from_object(animation_obj, bones_name_map, bones_map, is_ped_animation, animation_type, export_settings, rest_transforms,
+                                             samplings[animation_obj.name])
+                       for animation_obj, _ in changed_objs]
+
+    parallel = export_settings.parallel_animations if export_settings else False
+    encoded = encode_animations(animations_data, encoder, parallel)
+
+    for (animation_obj, digest), (animation, _, sequence_ranges), (sequences, animation_encoder) in zip(changed_objs, animations_data, encoded):
+        add_sequences_to_animation(animation, sequences, sequence_ranges)
+
+        fragment = ET.tostring(animation.to_xml())
+        if use_cache:
+            animation_cache.add(animation_obj.name, digest,
+                                fragment, animation_encoder)
+        animations[animation_obj.name] = fragment, animation_encoder
+
+    # Identical animations are written once, clips of the others reference it instead
+    share_animations = export_settings.share_duplicate_animations if export_settings else False
+    shared_hashes = {}
+    content_hashes = {}
+    shared_bytes = 0
     for animation_obj in animations_obj.children:
-        animation = animation_from_object(
-            animation_obj, bones_name_map, bones_map, is_ped_animation, animation_type)
+        fragment, animation_encoder = animations[animation_obj.name]
+        encoder.merge(animation_encoder)
+
+        if share_animations:
+            animation_hash = animation_obj.animation_properties.hash
+            content_digest = get_animation_content_digest(fragment)
+
+            if content_digest in content_hashes:
+                shared_hashes[animation_hash] = content_hashes[content_digest]
+                shared_bytes += len(fragment)
+                continue
 
-        clip_dictionary.animations.append(animation)
+            content_hashes[content_digest] = animation_hash
+
+        clip_dictionary.animations.append(ycdxml.CachedAnimation(fragment))
+
+    if len(shared_hashes) > 0:
+        exportop.message(
+            f"Shared {len(shared_hashes)} duplicate animation(s), saving {shared_bytes / 1024:.1f} KB of XML.")
 
     for clip_obj in clips_obj.children:
-        clip = clip_from_object(clip_obj)
+        clip = clip_from_object(clip_obj, shared_hashes, samplings)
 
         clip_dictionary.clips.append(clip)
 
@@ -511,5 +721,18 @@ def clip_dictionary_from_object(exportop, obj, exportpath, export_settings=None)
 
 
 def export_ycd(exportop, obj, filepath, export_settings):
+    animation_cache.hit_count = 0
+    encoder = TrackEncoder(export_settings.quaternion_channels)
+    if export_settings.compress_animations:
+        encoder = TrackEncoder(export_settings.quaternion_channels,
+                               export_settings.max_position_error, export_settings.max_rotation_error)
+
     clip_dictionary_from_object(
-        exportop, obj, filepath, export_settings).write_xml(filepath)
+        exportop, obj, filepath, export_settings, encoder).write_xml(filepath)
+
+    if encoder.is_compressed:
+        exportop.message(encoder.report())
+
+    if animation_cache.hit_count > 0:
+        exportop.message(
+            f"Reused {animation_cache.hit_count} unchanged animation(s) from the export cache.")
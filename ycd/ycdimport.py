@@ -1,10 +1,15 @@
 import os
+import re
 import bpy
-from mathutils import Vector, Quaternion, Matrix
+import numpy as np
+from functools import partial
+from itertools import tee
 from ..cwxml.clipsdictionary import YCD
+from ..cwxml.animcodec import AnimationData, decode_animation, decode_uv_animation, reduce_keyframes
 from ..sollumz_properties import SOLLUMZ_UI_NAMES, SollumType
 from ..tools.blenderhelper import build_bone_map, get_armature_obj
-from ..tools.animationhelper import is_ped_bone_tag
+from ..tools.animationhelper import is_ped_bone_tag, build_rest_transforms, get_uv_vector_math_node, INTERPOLATION_LINEAR
+from ..tools.workerpool import get_worker_count, create_process_pool, submit_prefetched
 from ..tools.utils import list_index_exists
 
 
@@ -17,340 +22,108 @@ def create_anim_obj(type):
     return anim_obj
 
 
-def insert_action_data(actions_data, type, track, bone_name, data):
-    if type not in actions_data:
-        actions_data[type] = {}
-
-    if track not in actions_data[type]:
-        actions_data[type][track] = {}
-
-    if bone_name not in actions_data[type][track]:
-        actions_data[type][track][bone_name] = []
-
-    actions_data[type][track][bone_name].append(data)
-
-
-def get_values_from_sequence_data(sequence_data, frame_id):
-    channel_values = []
-    for i in range(len(sequence_data.channels)):
-        while len(channel_values) <= i:
-            channel_values.append(None)
-
-        channel = sequence_data.channels[i]
-
-        if channel is not None:
-            channel_values[i] = channel.get_value(frame_id, channel_values)
-
-    return channel_values
-
-
-def get_location_from_sequence_data(sequence_data, frame_id, p_bone, is_convert_local_to_pose):
-    channel_values = get_values_from_sequence_data(sequence_data, frame_id)
-
-    if len(channel_values) == 1:
-        location = channel_values[0]
-    else:
-        location = Vector([
-            channel_values[0],
-            channel_values[1],
-            channel_values[2],
-        ])
-
-    if not is_convert_local_to_pose:
-        return location
-
-    mat = p_bone.bone.matrix_local
-
-    if p_bone.bone.parent is not None:
-        mat = p_bone.bone.parent.matrix_local.inverted() @ p_bone.bone.matrix_local
-
-    mat_decomposed = mat.decompose()
-
-    bone_location = mat_decomposed[0]
-    bone_rotation = mat_decomposed[1]
-
-    diff_location = Vector((
-        (location.x - bone_location.x),
-        (location.y - bone_location.y),
-        (location.z - bone_location.z),
-    ))
-
-    diff_location.rotate(bone_rotation.inverted())
-
-    return diff_location
+def get_animation_data(animation, bone_map):
+    """Channels of an animation as plain data, which can be sent to a worker process. Tracks
+    keep their bone id instead of being mapped to bones if bone_map is None."""
+    tracks = []
+    for bone_data in animation.bone_ids:
+        if bone_data is not None and bone_map is None:
+            tracks.append((bone_data.bone_id, bone_data.track))
+        elif bone_data is None or bone_data.bone_id not in bone_map:
+            tracks.append(None)
+        else:
+            tracks.append((bone_map[bone_data.bone_id].name, bone_data.track))
 
+    sequences = [[sequence_data.get_channels_data() for sequence_data in sequence.sequence_data]
+                 for sequence in animation.sequences]
 
-def get_quaternion_from_sequence_data(sequence_data, frame_id, p_bone, is_convert_local_to_pose):
-    channel_values = get_values_from_sequence_data(sequence_data, frame_id)
+    return AnimationData(animation.frame_count, animation.sequence_frame_limit, sequences, tracks)
 
-    if len(channel_values) == 1:
-        rotation = channel_values[0]
-    else:
-        if len(sequence_data.channels) <= 4:
-            for channel in sequence_data.channels:
-                if channel.type == "CachedQuaternion1" or channel.type == "CachedQuaternion2":
-                    cached_value = channel.get_value(frame_id, channel_values)
-
-                    if channel.quat_index == 0:
-                        channel_values = [
-                            cached_value, channel_values[0], channel_values[1], channel_values[2]]
-                    elif channel.quat_index == 1:
-                        channel_values = [
-                            channel_values[0], cached_value, channel_values[1], channel_values[2]]
-                    elif channel.quat_index == 2:
-                        channel_values = [
-                            channel_values[0], channel_values[1], cached_value, channel_values[2]]
-                    elif channel.quat_index == 3:
-                        channel_values = [
-                            channel_values[0], channel_values[1], channel_values[2], cached_value]
-
-            if channel.type == "CachedQuaternion2":
-                rotation = Quaternion(
-                    (channel_values[0], channel_values[1], channel_values[2], channel_values[3]))
-            else:
-                rotation = Quaternion(
-                    (channel_values[3], channel_values[0], channel_values[1], channel_values[2]))
-        else:
-            rotation = Quaternion(
-                (channel_values[3], channel_values[0], channel_values[1], channel_values[2]))
 
-    if is_convert_local_to_pose == True:
-        if p_bone.parent is not None:
-            pose_rot = Matrix.to_quaternion(p_bone.bone.matrix)
-            return pose_rot.rotation_difference(rotation)
+def decode_animations(animations, bone_map, rest_transforms, keyframe_tolerance=None, parallel=False, max_workers=None):
+    """Yields each (source, animation) pair of animations with the animation's decoded action
+    data. Animations are decoded by a process pool ahead of the one being yielded if parallel,
+    animations being read lazily so they can come from several files."""
+    decode = partial(decode_animation, rest_transforms=rest_transforms,
+                     keyframe_tolerance=keyframe_tolerance)
 
-        return rotation
-    else:
-        return rotation
-
-
-def combine_sequences_and_convert_to_groups(animation, armature, is_ped_animation):
-    bone_map = build_bone_map(armature)
-
-    sequence_frame_limit = animation.sequence_frame_limit
-
-    if len(animation.sequences) <= 1:
-        sequence_frame_limit = animation.frame_count + 30
-
-    actions_data = {}
-    for frame_id in range(0, animation.frame_count):
-        sequence_index = int(frame_id / (sequence_frame_limit))
-        sequence_frame = frame_id % (sequence_frame_limit)
-
-        if sequence_index >= len(animation.sequences):
-            sequence_index = len(animation.sequences) - 1
-
-        sequence = animation.sequences[sequence_index]
-        
-        for sequence_data_index, sequence_data in enumerate(sequence.sequence_data):
-            bone_data = animation.bone_ids[sequence_data_index]
-
-            if bone_data is None or bone_data.bone_id not in bone_map:
-                continue
-
-            p_bone = bone_map[bone_data.bone_id]
-
-            bone_name = p_bone.name
-
-            if bone_data.track == 0:
-                location = get_location_from_sequence_data(
-                    sequence_data, sequence_frame, p_bone, True)
-                insert_action_data(actions_data, "base",
-                                   bone_data.track, bone_name, location)
-            elif bone_data.track == 1:
-                rotation = get_quaternion_from_sequence_data(
-                    sequence_data, sequence_frame, p_bone, True)
-                insert_action_data(actions_data, "base",
-                                   bone_data.track, bone_name, rotation)
-            elif bone_data.track == 2:
-                scale = get_location_from_sequence_data(
-                    sequence_data, sequence_frame, p_bone, False)
-                insert_action_data(actions_data, "base",
-                                   bone_data.track, bone_name, scale)
-            elif bone_data.track == 5:
-                location = get_location_from_sequence_data(
-                    sequence_data, sequence_frame, p_bone, True)
-                insert_action_data(
-                    actions_data, "root_motion_location", bone_data.track, bone_name, location)
-            elif bone_data.track == 6:
-                rotation = get_quaternion_from_sequence_data(
-                    sequence_data, sequence_frame, p_bone, False)
-                insert_action_data(
-                    actions_data, "root_motion_rotation", bone_data.track, bone_name, rotation)                
-
-    for type in actions_data:
-        for track in actions_data[type]:
-            if track == 1:
-                bones_data = actions_data[type][track]
-
-                if "SKEL_L_Thigh" in bones_data:
-                    bones_data["RB_L_ThighRoll"] = list(
-                        bones_data["SKEL_L_Thigh"])
-
-                if "SKEL_R_Thigh" in bones_data:
-                    bones_data["RB_R_ThighRoll"] = list(
-                        bones_data["SKEL_R_Thigh"])
-
-    return actions_data
-
-
-def apply_action_data_to_action(action_data, action, frame_count):
-    frames_ids = [*range(frame_count)]
+    if not parallel:
+        for source, animation in animations:
+            yield source, animation, decode(get_animation_data(animation, bone_map))
+        return
 
+    animations, data_animations = tee(animations)
+    worker_count = get_worker_count(max_workers or os.cpu_count() or 1)
+    with create_process_pool(worker_count) as pool:
+        animations_data = (get_animation_data(animation, bone_map)
+                           for _, animation in data_animations)
+        decoded = submit_prefetched(
+            pool, decode, animations_data, worker_count * 2)
+
+        for (source, animation), (_, future) in zip(animations, decoded):
+            yield source, animation, future.result()
+
+
+def add_action_fcurves(action, data_path, frames_ids, values, group=None, reduced=False):
+    """Fcurve for each column of values, keyed at frames_ids"""
+    for index in range(values.shape[1]):
+        curve = action.fcurves.new(data_path=data_path, index=index)
+        curve.group = group
+        curve.keyframe_points.add(len(values))
+        curve.keyframe_points.foreach_set(
+            "co", np.column_stack((frames_ids, values[:, index])).ravel())
+        if reduced:
+            # Keys were fit for linear interpolation
+            curve.keyframe_points.foreach_set(
+                "interpolation", [INTERPOLATION_LINEAR] * len(values))
+        curve.update()
+
+
+def apply_action_data_to_action(action_data, action, frame_count, reduced=False):
     for track_id, bones_data in action_data.items():
-        type = None
+        data_path = None
 
         if track_id == 0 or track_id == 5:
-            type = "location"
+            data_path = 'pose.bones["%s"].location'
         elif track_id == 1 or track_id == 6:
-            type = "rotation"
+            data_path = 'pose.bones["%s"].rotation_quaternion'
         elif track_id == 2:
-            type = "scale"
+            data_path = 'pose.bones["%s"].scale'
+
+        if data_path is None:
+            continue
 
-        for bone_name, frames_data in bones_data.items():
+        for bone_name, (frames_ids, values) in bones_data.items():
             group_item = action.groups.new('%s-%s' % (bone_name, track_id))
 
-            if type == "location":
-                data_path_loc = 'pose.bones["%s"].location' % bone_name
-
-                location_tracks_x = list(
-                    map(lambda location: location.x, frames_data))
-                location_tracks_y = list(
-                    map(lambda location: location.y, frames_data))
-                location_tracks_z = list(
-                    map(lambda location: location.z, frames_data))
-
-                pos_curve_x = action.fcurves.new(
-                    data_path=data_path_loc, index=0)
-                pos_curve_y = action.fcurves.new(
-                    data_path=data_path_loc, index=1)
-                pos_curve_z = action.fcurves.new(
-                    data_path=data_path_loc, index=2)
-
-                pos_curve_x.group = group_item
-                pos_curve_y.group = group_item
-                pos_curve_z.group = group_item
-
-                pos_curve_x.keyframe_points.add(len(frames_data))
-                pos_curve_y.keyframe_points.add(len(frames_data))
-                pos_curve_z.keyframe_points.add(len(frames_data))
-
-                pos_curve_x.keyframe_points.foreach_set(
-                    "co", [x for co in zip(frames_ids, location_tracks_x) for x in co])
-                pos_curve_y.keyframe_points.foreach_set(
-                    "co", [x for co in zip(frames_ids, location_tracks_y) for x in co])
-                pos_curve_z.keyframe_points.foreach_set(
-                    "co", [x for co in zip(frames_ids, location_tracks_z) for x in co])
-
-                pos_curve_x.update()
-                pos_curve_y.update()
-                pos_curve_z.update()
-            elif type == "scale":
-                data_path_loc = 'pose.bones["%s"].scale' % bone_name
-
-                scale_tracks_x = list(
-                    map(lambda location: location.x, frames_data))
-                scale_tracks_y = list(
-                    map(lambda location: location.y, frames_data))
-                scale_tracks_z = list(
-                    map(lambda location: location.z, frames_data))
-
-                pos_curve_x = action.fcurves.new(
-                    data_path=data_path_loc, index=0)
-                pos_curve_y = action.fcurves.new(
-                    data_path=data_path_loc, index=1)
-                pos_curve_z = action.fcurves.new(
-                    data_path=data_path_loc, index=2)
-
-                pos_curve_x.group = group_item
-                pos_curve_y.group = group_item
-                pos_curve_z.group = group_item
-
-                pos_curve_x.keyframe_points.add(len(frames_data))
-                pos_curve_y.keyframe_points.add(len(frames_data))
-                pos_curve_z.keyframe_points.add(len(frames_data))
-
-                pos_curve_x.keyframe_points.foreach_set(
-                    "co", [x for co in zip(frames_ids, scale_tracks_x) for x in co])
-                pos_curve_y.keyframe_points.foreach_set(
-                    "co", [x for co in zip(frames_ids, scale_tracks_y) for x in co])
-                pos_curve_z.keyframe_points.foreach_set(
-                    "co", [x for co in zip(frames_ids, scale_tracks_z) for x in co])
-
-                pos_curve_x.update()
-                pos_curve_y.update()
-                pos_curve_z.update()
-            elif type == "rotation":
-                data_path_rot = 'pose.bones["%s"].rotation_quaternion' % bone_name
-
-                rotation_tracks_x = list(
-                    map(lambda rotation: rotation.x, frames_data))
-                rotation_tracks_y = list(
-                    map(lambda rotation: rotation.y, frames_data))
-                rotation_tracks_z = list(
-                    map(lambda rotation: rotation.z, frames_data))
-                rotation_tracks_w = list(
-                    map(lambda rotation: rotation.w, frames_data))
-
-                rot_curve_w = action.fcurves.new(
-                    data_path=data_path_rot, index=0)
-                rot_curve_x = action.fcurves.new(
-                    data_path=data_path_rot, index=1)
-                rot_curve_y = action.fcurves.new(
-                    data_path=data_path_rot, index=2)
-                rot_curve_z = action.fcurves.new(
-                    data_path=data_path_rot, index=3)
-
-                rot_curve_w.group = group_item
-                rot_curve_x.group = group_item
-                rot_curve_y.group = group_item
-                rot_curve_z.group = group_item
-
-                rot_curve_w.keyframe_points.add(len(frames_data))
-                rot_curve_x.keyframe_points.add(len(frames_data))
-                rot_curve_y.keyframe_points.add(len(frames_data))
-                rot_curve_z.keyframe_points.add(len(frames_data))
-
-                rot_curve_w.keyframe_points.foreach_set(
-                    "co", [x for co in zip(frames_ids, rotation_tracks_w) for x in co])
-                rot_curve_x.keyframe_points.foreach_set(
-                    "co", [x for co in zip(frames_ids, rotation_tracks_x) for x in co])
-                rot_curve_y.keyframe_points.foreach_set(
-                    "co", [x for co in zip(frames_ids, rotation_tracks_y) for x in co])
-                rot_curve_z.keyframe_points.foreach_set(
-                    "co", [x for co in zip(frames_ids, rotation_tracks_z) for x in co])
-
-                rot_curve_w.update()
-                rot_curve_x.update()
-                rot_curve_y.update()
-                rot_curve_z.update()
-
-
-def actions_data_to_actions(action_name, actions_data, armature, frame_count):
+            # Quaternions are (w, x, y, z) rows, same as rotation_quaternion
+            add_action_fcurves(action, data_path % bone_name,
+                               frames_ids, values, group_item, reduced)
+
+
+def actions_data_to_actions(action_name, actions_data, armature, frame_count, reduced=False):
     actions = {}
 
     for action_type in actions_data:
         action = bpy.data.actions.new(f"{action_name}_{action_type}")
 
         apply_action_data_to_action(
-            actions_data[action_type], action, frame_count)
+            actions_data[action_type], action, frame_count, reduced)
 
         actions[action_type] = action
 
     return actions
 
 
-def animation_to_obj(animation, armature, is_ped_animation):
+def animation_to_obj(animation, actions_data, armature, is_ped_animation, reduced=False):
     animation_obj = create_anim_obj(SollumType.ANIMATION)
 
     animation_obj.name = animation.hash
     animation_obj.animation_properties.hash = animation.hash
     animation_obj.animation_properties.frame_count = animation.frame_count
 
-    actions_data = combine_sequences_and_convert_to_groups(
-        animation, armature, is_ped_animation)
     actions = actions_data_to_actions(
-        animation.hash, actions_data, armature, animation.frame_count)
+        animation.hash, actions_data, armature, animation.frame_count, reduced)
 
     if "base" in actions:
         animation_obj.animation_properties.base_action = actions["base"]
@@ -366,6 +139,70 @@ def animation_to_obj(animation, armature, is_ped_animation):
     return animation_obj
 
 
+def get_uv_animation_material(obj, animation_hash):
+    """Material of obj a UV animation is for, by the material index its hash ends with
+    (e.g. prop_uv_1), or the active material"""
+    match = re.search(r"_uv_(\d+)$", animation_hash)
+    if match is not None and int(match.group(1)) < len(obj.data.materials):
+        material = obj.data.materials[int(match.group(1))]
+        if material is not None:
+            return material
+
+    return obj.active_material
+
+
+def uv_animation_to_obj(animation, obj, keyframe_tolerance=None, animated_materials=None):
+    """Animation object of a UV animation, keying the UV offset of the Vector Math node of its
+    material same as export reads it, in the object's base action. The material's node tree
+    plays the action unless animated_materials, mapping material names to the hash of the
+    animation their node tree plays, already has the material. Returns the object and whether
+    the node was found."""
+    animation_obj = create_anim_obj(SollumType.ANIMATION)
+
+    animation_obj.name = animation.hash
+    animation_obj.animation_properties.hash = animation.hash
+    animation_obj.animation_properties.frame_count = animation.frame_count
+
+    material = get_uv_animation_material(obj, animation.hash)
+    animation_obj.uv_anim_materials.material = material
+
+    bones_offsets = decode_uv_animation(get_animation_data(animation, None))
+    if not bones_offsets:
+        return animation_obj, True
+
+    # Export writes the offsets of the material's node as bone id 0
+    offsets = bones_offsets.get(0, next(iter(bones_offsets.values())))
+
+    vector_math_node = get_uv_vector_math_node(
+        material) if material is not None else None
+    if vector_math_node is None:
+        return animation_obj, False
+
+    # Export flips v, the game's v axis points down
+    offsets[:, 1] *= -1
+    frames_ids = np.arange(len(offsets))
+    if keyframe_tolerance is not None:
+        frames_ids = reduce_keyframes(offsets, keyframe_tolerance)
+        offsets = offsets[frames_ids]
+
+    action = bpy.data.actions.new(f"{animation.hash}_uv")
+    add_action_fcurves(action, vector_math_node.inputs[1].path_from_id("default_value"),
+                       frames_ids, offsets, reduced=keyframe_tolerance is not None)
+    animation_obj.animation_properties.base_action = action
+
+    if animated_materials is not None:
+        if material.name in animated_materials:
+            return animation_obj, True
+
+        animated_materials[material.name] = animation.hash
+
+    node_tree = material.node_tree
+    animation_data = node_tree.animation_data or node_tree.animation_data_create()
+    animation_data.action = action
+
+    return animation_obj, True
+
+
 def clip_to_obj(clip, animations_map, animations_obj_map):
     clip_obj = create_anim_obj(SollumType.CLIP)
 
@@ -424,7 +261,7 @@ def create_clip_dictionary_template(name, obj, anim_type):
     return clip_dictionary_obj, clips_obj, animations_obj
 
 
-def clip_dictionary_to_obj(clip_dictionary, name, armature, armature_obj):
+def clip_dictionary_to_obj(clip_dictionary, name, armature, armature_obj, keyframe_tolerance=None, parallel=False):
     animation_type = bpy.context.scene.create_animation_type
     _, clips_obj, animations_obj = create_clip_dictionary_template(
         name, armature_obj, animation_type)
@@ -438,22 +275,91 @@ def clip_dictionary_to_obj(clip_dictionary, name, armature, armature_obj):
 
     animations_map = {}
     animations_obj_map = {}
+    rest_transforms = build_rest_transforms(armature_obj)
+
+    # Only actions and fcurves are created here, the animations are decoded by decode_animation
+    animations = [(None, animation)
+                  for animation in clip_dictionary.animations]
+    decoded = decode_animations(animations, build_bone_map(armature_obj), rest_transforms,
+                                keyframe_tolerance, parallel and len(animations) > 1, len(animations))
+    for _, animation, actions_data in decoded:
+        animations_map[animation.hash] = animation
+
+        animation_obj = animation_to_obj(
+            animation, actions_data, armature_obj, is_ped_animation, keyframe_tolerance is not None)
+        animation_obj.parent = animations_obj
+
+        animations_obj_map[animation.hash] = animation_obj
+
+    for clip in clip_dictionary.clips:
+        clip_obj = clip_to_obj(clip, animations_map, animations_obj_map)
+        clip_obj.parent = clips_obj
+
+
+def uv_clip_dictionary_to_obj(clip_dictionary, name, obj, keyframe_tolerance=None):
+    """Import a UV clip dictionary for the materials of obj. Returns the hashes of the
+    animations whose material has no Vector Math node to key, and of the animations whose
+    material already plays an earlier animation of the dictionary."""
+    _, clips_obj, animations_obj = create_clip_dictionary_template(
+        name, obj, "UV")
+
+    animations_map = {}
+    animations_obj_map = {}
+    missing_nodes = []
+    shared_materials = []
+    animated_materials = {}
 
     for animation in clip_dictionary.animations:
         animations_map[animation.hash] = animation
 
-        animation_obj = animation_to_obj(
-            animation, armature_obj, is_ped_animation)
+        animation_obj, has_node = uv_animation_to_obj(
+            animation, obj, keyframe_tolerance, animated_materials)
         animation_obj.parent = animations_obj
 
         animations_obj_map[animation.hash] = animation_obj
+        if not has_node:
+            missing_nodes.append(animation.hash)
+
+        material = animation_obj.uv_anim_materials.material
+        if animation_obj.animation_properties.base_action is not None and \
+                animated_materials.get(material.name, animation.hash) != animation.hash:
+            shared_materials.append(animation.hash)
 
     for clip in clip_dictionary.clips:
         clip_obj = clip_to_obj(clip, animations_map, animations_obj_map)
         clip_obj.parent = clips_obj
 
+    return missing_nodes, shared_materials
+
+
+def import_uv_ycd(export_op, filepath, import_settings):
+    obj = bpy.context.active_object
+    if obj is None or obj.type != "MESH" or len(obj.data.materials) < 1:
+        export_op.warning(
+            "Select the mesh whose materials the UV animations are for.")
+        return
+
+    missing_nodes, shared_materials = uv_clip_dictionary_to_obj(
+        YCD.from_xml_file(filepath),
+        os.path.basename(filepath.replace(YCD.file_extension, "")),
+        obj,
+        import_settings.keyframe_tolerance if import_settings.reduce_keyframes else None
+    )
+
+    if missing_nodes:
+        export_op.warning(
+            f"No UV node to key in the materials of: {', '.join(missing_nodes)}. Add one with 'Add UV node to material' and import again.")
+
+    if shared_materials:
+        export_op.warning(
+            f"The materials of {', '.join(shared_materials)} already play another animation of the dictionary, their keyframes are only in their animation's Base action.")
+
 
 def import_ycd(export_op, filepath, import_settings):
+    if bpy.context.scene.create_animation_type == "UV":
+        import_uv_ycd(export_op, filepath, import_settings)
+        return
+
     if import_settings.selected_armature == -1 or not list_index_exists(bpy.data.armatures, import_settings.selected_armature):
         export_op.warning("Selected target skeleton not found.")
         return
@@ -463,16 +369,56 @@ def import_ycd(export_op, filepath, import_settings):
 
     ycr_xml = YCD.from_xml_file(filepath)
 
-    animation_type = bpy.context.scene.create_animation_type
-    if animation_type == "UV":
-        export_op.warning("UV import is not supported. Change the animation type under Animation Tools panel")
-        return
-
     clip_dictionary_to_obj(
         ycr_xml,
         os.path.basename(
             filepath.replace(YCD.file_extension, "")
         ),
         armature,
-        armature_obj
+        armature_obj,
+        import_settings.keyframe_tolerance if import_settings.reduce_keyframes else None,
+        import_settings.parallel_animations
     )
+
+
+def get_missing_bone_tags(animation, bone_map):
+    """Bone tags of the bone tracks of animation that are not in bone_map"""
+    return {bone_data.bone_id for bone_data in animation.bone_ids
+            if bone_data is not None and bone_data.track in (0, 1, 2, 5, 6) and bone_data.bone_id not in bone_map}
+
+
+def import_ycd_actions(filepaths, armature_obj, keyframe_tolerance=None, parallel=False):
+    """Import the animations of each YCD file as actions for armature_obj, without creating
+    clip dictionaries or assigning the actions. The bone map and rest transforms of the armature
+    are built once for all files. Returns the actions created for each file, and the bone tags
+    missing from the armature of each file that references any."""
+    bone_map = build_bone_map(armature_obj)
+    rest_transforms = build_rest_transforms(armature_obj)
+
+    actions = {filepath: [] for filepath in filepaths}
+    missing_bone_tags = {}
+
+    def iter_animations():
+        for filepath in filepaths:
+            clip_dictionary = YCD.from_xml_file(filepath)
+
+            for animation in clip_dictionary.animations:
+                missing = get_missing_bone_tags(animation, bone_map)
+                if missing:
+                    missing_bone_tags.setdefault(
+                        filepath, set()).update(missing)
+
+                yield filepath, animation
+
+    decoded = decode_animations(
+        iter_animations(), bone_map, rest_transforms, keyframe_tolerance, parallel)
+    for filepath, animation, actions_data in decoded:
+        animation_actions = actions_data_to_actions(
+            animation.hash, actions_data, armature_obj, animation.frame_count, keyframe_tolerance is not None)
+
+        for action in animation_actions.values():
+            # Not assigned to anything, keep it when the file is saved
+            action.use_fake_user = True
+            actions[filepath].append(action)
+
+    return actions, missing_bone_tags
@@ -1,14 +1,16 @@
 import bpy
 import os
-from ..cwxml.drawable import YDD
+from ..cwxml.drawable import YDD, Drawable
+from ..cwxml.element import skipped_elements
 from ..cwxml.fragment import YFT
-from ..ydr.ydrimport import drawable_to_obj
+from ..ydr.ydrimport import iter_drawable_to_obj, get_skipped_model_tags
 from ..tools.drawablehelper import join_drawable_geometries
 from ..sollumz_properties import SollumType
 from ..sollumz_helper import find_fragment_file
+from ..tools.utils import run_steps
 
 
-def drawable_dict_to_obj(drawable_dict, filepath, import_settings):
+def iter_drawable_dict_to_obj(drawable_dict, filepath, import_settings):
 
     name = os.path.basename(filepath)[:-8]
     vmodels = []
@@ -27,8 +29,8 @@ def drawable_dict_to_obj(drawable_dict, filepath, import_settings):
         # If is_ydd is not passed or set to False in case of YDD,
         # drawable_model and drawable_mesh are rotated by 180° on Z-axis
 
-        drawable_obj = drawable_to_obj(
-            drawable, filepath, drawable.name, bones_override=drawable_with_skel.skeleton.bones if drawable_with_skel else None, import_settings=import_settings, is_ydd=True)
+        drawable_obj = yield from iter_drawable_to_obj(
+            drawable, filepath, drawable.name, bones_override=drawable_with_skel.skeleton.bones if drawable_with_skel else None, import_settings=import_settings, is_ydd=True, join_geometries=import_settings.join_geometries)
         if (armature_with_skel_obj is None and drawable_with_skel is not None and len(drawable.skeleton.bones) > 0):
             armature_with_skel_obj = drawable_obj
 
@@ -59,22 +61,35 @@ def drawable_dict_to_obj(drawable_dict, filepath, import_settings):
     return dict_obj
 
 
-def import_ydd(export_op, filepath, import_settings):
-    ydd_xml = YDD.from_xml_file(filepath)
+def drawable_dict_to_obj(drawable_dict, filepath, import_settings):
+    return run_steps(iter_drawable_dict_to_obj(drawable_dict, filepath, import_settings))
+
+
+def iter_import_ydd(export_op, filepath, import_settings, ydd_xml=None):
+    if ydd_xml is None:
+        yield "Parsing"
+        with skipped_elements(Drawable, get_skipped_model_tags(import_settings)):
+            ydd_xml = YDD.from_xml_file(filepath)
 
     if import_settings.import_ext_skeleton:
+        yield "External skeleton"
         skel_filepath = find_fragment_file(filepath)
         if skel_filepath:
-            yft = YFT.from_xml_file(skel_filepath)
+            skeleton = YFT.skeleton_from_xml_file(skel_filepath)
             for drawable in ydd_xml:
-                drawable.skeleton = yft.drawable.skeleton
+                drawable.skeleton = skeleton
         else:
             export_op.warning("No external skeleton file found.")
 
-    drawable_dict = drawable_dict_to_obj(ydd_xml, filepath, import_settings)
+    drawable_dict = yield from iter_drawable_dict_to_obj(ydd_xml, filepath, import_settings)
     if import_settings.join_geometries:
+        yield "Joining geometries"
         for child in drawable_dict.children:
             if child.sollum_type == SollumType.DRAWABLE:
                 for grandchild in child.children:
                     if grandchild.sollum_type == SollumType.DRAWABLE_MODEL:
                         join_drawable_geometries(grandchild)
+
+
+def import_ydd(export_op, filepath, import_settings, ydd_xml=None):
+    run_steps(iter_import_ydd(export_op, filepath, import_settings, ydd_xml))
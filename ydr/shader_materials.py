@@ -1,5 +1,6 @@
 import bpy
 
+from bpy.app.handlers import persistent
 from ..tools.version import USE_LEGACY
 from ..cwxml.shader import ShaderManager
 from ..sollumz_properties import MaterialType
@@ -9,6 +10,10 @@ ShaderMaterial = namedtuple("ShaderMaterial", "name, ui_name, value")
 
 shadermats = []
 
+# Names of the hidden template materials by (shader name, filename). New shader materials
+# are copies of these instead of having their node tree built from scratch every time.
+shader_templates = {}
+
 for shader in ShaderManager.shaders.values():
     shadermats.append(ShaderMaterial(
         shader.name.upper(), shader.name.upper().replace("_", " "), shader.name))
@@ -124,12 +129,17 @@ def create_tinted_texture_from_image(img):  # move to blenderhelper.py?
     return txt
 
 
+def needs_tinted_shader_graph(mat):
+    return mat.shader_properties.filename not in ShaderManager.tint_flag_2 and get_tinted_sampler(mat) is not None
+
+
 def create_tinted_shader_graph(obj):  # move to blenderhelper.py?
     mat = obj.data.materials[0]
-    tint_img = get_tinted_sampler(mat)
-    if mat.shader_properties.filename in ShaderManager.tint_flag_2 or tint_img is None:  # check here or?
+    if not needs_tinted_shader_graph(mat):  # check here or?
         return
 
+    tint_img = get_tinted_sampler(mat)
+
     bpy.ops.object.select_all(action="DESELECT")
     bpy.context.view_layer.objects.active = obj
     obj.select_set(True)
@@ -145,7 +155,9 @@ def create_tinted_shader_graph(obj):  # move to blenderhelper.py?
     else:
         txt_node.inputs[1].default_value = txt
 
-    obj.data.vertex_colors.new(name="TintColor")
+    # Mesh may be shared with an object that already has it
+    if "TintColor" not in obj.data.vertex_colors:
+        obj.data.vertex_colors.new(name="TintColor")
 
 
 def link_geos(links, node1, node2):
@@ -757,13 +769,7 @@ def create_terrain_shader(mat, shader, filename):
     link_value_shader_parameters(shader, node_tree)
 
 
-def create_shader(name, filename=None):
-    if not name in ShaderManager.shaders:
-        raise AttributeError(f"Shader '{name}' does not exist!")
-
-    shader = ShaderManager.shaders[name]
-    filename = filename if filename else shader.filenames[0].value
-
+def build_shader(name, shader, filename):
     mat = bpy.data.materials.new(name)
     mat.sollum_type = MaterialType.SHADER
     mat.use_nodes = True
@@ -779,3 +785,63 @@ def create_shader(name, filename=None):
     organize_node_tree(mat.node_tree)
 
     return mat
+
+
+def get_shader_template(shader, filename):
+    """Get the template material for the shader, building it the first time it is needed."""
+    template = bpy.data.materials.get(
+        shader_templates.get((shader.name, filename), ""))
+
+    if template is None:
+        # Leading "." hides the template from material lists in the UI. It has no users,
+        # so it is never saved with the .blend file.
+        template = build_shader(
+            f".{shader.name}.{filename}.template", shader, filename)
+        shader_templates[(shader.name, filename)] = template.name
+
+    return template
+
+
+def clear_shader_templates():
+    for template_name in shader_templates.values():
+        template = bpy.data.materials.get(template_name)
+        if template is not None:
+            bpy.data.materials.remove(template)
+
+    shader_templates.clear()
+
+
+def reload_changed_shaders():
+    """Reload Shaders.xml if it was modified since it was loaded, rebuilding templates from it.
+    Checked once per import rather than for every material created."""
+    if ShaderManager.shaders_changed():
+        ShaderManager.load_shaders()
+        clear_shader_templates()
+
+
+def create_shader(name, filename=None):
+    if not name in ShaderManager.shaders:
+        raise AttributeError(f"Shader '{name}' does not exist!")
+
+    shader = ShaderManager.shaders[name]
+    filename = filename if filename else shader.filenames[0].value
+
+    mat = get_shader_template(shader, filename).copy()
+    mat.name = name
+
+    return mat
+
+
+@persistent
+def on_file_loaded(_):
+    # Templates belonged to the previous file
+    shader_templates.clear()
+    reload_changed_shaders()
+
+
+def register():
+    bpy.app.handlers.load_post.append(on_file_loaded)
+
+
+def unregister():
+    bpy.app.handlers.load_post.remove(on_file_loaded)
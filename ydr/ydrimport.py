@@ -1,14 +1,18 @@
 from math import pi, radians
+import hashlib
 import os
 import bpy
+import numpy as np
 from mathutils import Matrix
-from .shader_materials import create_shader, create_tinted_shader_graph, get_detail_extra_sampler
+from .shader_materials import create_shader, create_tinted_shader_graph, needs_tinted_shader_graph, get_detail_extra_sampler
 from ..ybn.ybnimport import composite_to_obj, bound_to_obj
 from ..sollumz_properties import SOLLUMZ_UI_NAMES, LODLevel, TextureFormat, TextureUsage, SollumType, LightType
-from ..cwxml.drawable import YDR
+from ..cwxml.drawable import YDR, Drawable
+from ..cwxml.element import skipped_elements
 from ..tools.meshhelper import create_uv_layer, create_vertexcolor_layer
 from ..tools.blenderhelper import build_tag_bone_map, remove_unused_vertex_groups_of_mesh, join_objects, remove_unused_materials
 from ..tools.drawablehelper import join_drawable_geometries
+from ..tools.utils import run_steps
 
 
 def shadergroup_to_materials(shadergroup, filepath):
@@ -377,10 +381,235 @@ def obj_from_buffer(vertex_buffer, index_buffer, material, bones=None, name=None
 
 
 def geometry_to_obj(geometry, material, bones=None, name=None):
-    vertex_buffer = geometry.vertex_buffer.get_data()
-    index_buffer = [geometry.index_buffer.data[i * 3:(i + 1) * 3]
-                    for i in range((len(geometry.index_buffer.data) + 3 - 1) // 3)]
-    return obj_from_buffer(vertex_buffer, index_buffer, material, bones, name)
+    # Same as a joined model of a single geometry, built from the vertex arrays
+    return joined_geometries_to_obj([geometry], {geometry.shader_index: material}, bones, name)
+
+
+def joined_geometries_to_obj(geometries, materials, bones=None, name=None):
+    """Build a single object from all geometries of a model. Same result as creating an
+    object per geometry and joining them, without building the intermediate meshes."""
+    positions = []
+    normals = []
+    faces = []
+    face_materials = []
+    face_smooth = []
+    texcoords = {}
+    colors = {}
+    weights = []
+    mesh_materials = []
+    vertex_count = 0
+
+    for geometry in geometries:
+        columns = geometry.vertex_buffer.get_columns()
+        if "position" not in columns or len(columns["position"]) < 1:
+            continue
+
+        count = len(columns["position"])
+
+        material = materials[geometry.shader_index]
+        if material not in mesh_materials:
+            mesh_materials.append(material)
+
+        indices = np.asarray(geometry.index_buffer.data, dtype=np.int32)
+        indices = indices[:len(indices) - len(indices) % 3].reshape(-1, 3)
+        faces.append(indices + vertex_count)
+        face_materials.append(
+            np.full(len(indices), mesh_materials.index(material), dtype=np.int32))
+        # Faces of geometries without normals stay flat
+        face_smooth.append(np.full(len(indices), "normal" in columns))
+
+        positions.append(columns["position"])
+        if "normal" in columns:
+            normals.append(columns["normal"])
+        else:
+            # Zero custom normals fall back to the automatic ones
+            normals.append(np.zeros((count, 3), dtype=np.float32))
+
+        for key, value in columns.items():
+            if "texcoord" in key:
+                texcoords.setdefault(key, {})[vertex_count] = value
+            if "colour" in key:
+                colors.setdefault(key, {})[vertex_count] = value / 255
+
+        if columns.get("blendweights") is not None:
+            weights.append((vertex_count, columns["blendweights"] / 255,
+                            columns["blendindices"]))
+
+        vertex_count += count
+
+    positions = np.concatenate(positions) if positions else np.zeros((0, 3))
+    faces = np.concatenate(faces) if faces else np.zeros((0, 3), dtype=np.int32)
+
+    mesh = bpy.data.meshes.new(SOLLUMZ_UI_NAMES[SollumType.DRAWABLE_GEOMETRY])
+    mesh.vertices.add(vertex_count)
+    mesh.vertices.foreach_set("co", positions.ravel())
+    mesh.loops.add(faces.size)
+    mesh.loops.foreach_set("vertex_index", faces.ravel())
+    mesh.polygons.add(len(faces))
+    mesh.polygons.foreach_set(
+        "loop_start", np.arange(0, faces.size, 3, dtype=np.int32))
+    mesh.polygons.foreach_set(
+        "loop_total", np.full(len(faces), 3, dtype=np.int32))
+    if face_materials:
+        mesh.polygons.foreach_set(
+            "material_index", np.concatenate(face_materials))
+        mesh.polygons.foreach_set(
+            "use_smooth", np.concatenate(face_smooth))
+    mesh.update(calc_edges=True)
+    mesh.validate()
+
+    for material in mesh_materials:
+        mesh.materials.append(material)
+
+    if any(np.any(smooth) for smooth in face_smooth):
+        mesh.normals_split_custom_set_from_vertices(
+            np.concatenate(normals))
+        mesh.use_auto_smooth = True
+
+    # Vertex of each loop, after validate removed any invalid faces
+    loop_vertices = np.zeros(len(mesh.loops), dtype=np.int32)
+    mesh.loops.foreach_get("vertex_index", loop_vertices)
+
+    def per_vertex(arrays, width, fill):
+        # Vertices of geometries without the layer get the same value join would give them
+        data = np.full((vertex_count, width), fill, dtype=np.float32)
+        for start, array in arrays.items():
+            data[start:start + len(array)] = array
+        return data
+
+    for layer_name, coords in texcoords.items():
+        uvs = per_vertex(coords, 2, 0)
+        uvs[:, 1] = 1 - uvs[:, 1]
+        uv_layer = mesh.uv_layers.new(name=layer_name)
+        uv_layer.data.foreach_set("uv", uvs[loop_vertices].ravel())
+
+    for layer_name, color in colors.items():
+        color_layer = mesh.vertex_colors.new(name=layer_name)
+        color_layer.data.foreach_set(
+            "color", per_vertex(color, 4, 1)[loop_vertices].ravel())
+
+    obj = bpy.data.objects.new(name, mesh)
+
+    if weights:
+        bone_count = 256 if not bones else len(bones)
+        group_count = max(256, bone_count)
+        # Total weight of each vertex in each group, in the order obj_from_buffer adds them
+        keys = np.concatenate([(start + np.arange(len(blend_weights)))[:, None] * group_count + blend_indices
+                               for start, blend_weights, blend_indices in weights]).ravel()
+        values = np.concatenate(
+            [blend_weights for _, blend_weights, _ in weights]).ravel()
+        keys, inverse = np.unique(keys[values > 0], return_inverse=True)
+        values = np.bincount(inverse, weights=values[values > 0])
+        vertex_indices, group_indices = np.divmod(keys, group_count)
+
+        used_groups = set(group_indices.tolist())
+        for i in range(group_count):
+            if i not in used_groups:
+                continue
+            bone_name = bones[i].name if bones and i < bone_count else "UNK"
+            vertex_group = obj.vertex_groups.new(name=bone_name)
+            in_group = group_indices == i
+            group_vertices = vertex_indices[in_group]
+            group_weights = values[in_group]
+            for weight in np.unique(group_weights):
+                vertex_group.add(
+                    group_vertices[group_weights == weight].tolist(), float(weight), "ADD")
+
+    obj.sollum_type = SollumType.DRAWABLE_GEOMETRY
+    bpy.context.collection.objects.link(obj)
+
+    return obj
+
+
+class MeshCache:
+    """Meshes built during an import, by a hash of their geometry. Identical geometries
+    share a single mesh datablock instead of each building their own."""
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        # Mesh and vertex group names by geometry digest
+        self.meshes = {}
+        self.shared_count = 0
+        self.shared_bytes = 0
+
+    def get_material_key(self, material):
+        """Shader and parameters of material, materials of the same name can differ"""
+        values = [material.shader_properties.name,
+                  material.shader_properties.filename,
+                  material.shader_properties.renderbucket]
+        for node in material.node_tree.nodes:
+            if isinstance(node, bpy.types.ShaderNodeTexImage):
+                values.append((node.name, node.image.name if node.image else None))
+            elif isinstance(node, bpy.types.ShaderNodeValue):
+                values.append((node.name, node.outputs[0].default_value))
+
+        return repr(values)
+
+    def get_digest(self, geometry, material, bones):
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(self.get_material_key(material).encode())
+        if bones:
+            digest.update(repr([bone.name for bone in bones]).encode())
+        for name, column in geometry.vertex_buffer.get_columns().items():
+            digest.update(repr((name, column.dtype.str, column.shape)).encode())
+            digest.update(np.ascontiguousarray(column).tobytes())
+        digest.update(np.asarray(geometry.index_buffer.data,
+                      dtype=np.uint32).tobytes())
+
+        return digest.digest()
+
+    def get(self, digest):
+        if digest not in self.meshes:
+            return None
+
+        mesh, group_names = self.meshes[digest]
+        try:
+            mesh.name
+        except ReferenceError:
+            # Removed since, e.g. by joining geometries
+            del self.meshes[digest]
+            return None
+
+        return mesh, group_names
+
+    def add(self, digest, obj):
+        self.meshes[digest] = (
+            obj.data, [group.name for group in obj.vertex_groups])
+
+    def add_shared(self, geometry):
+        columns = geometry.vertex_buffer.get_columns()
+        # Rough size of the mesh data: 4 bytes per vertex component and per index
+        self.shared_count += 1
+        self.shared_bytes += sum(column.size for column in columns.values()) * 4 + \
+            len(geometry.index_buffer.data) * 4
+
+
+mesh_cache = MeshCache()
+
+
+def shared_geometry_to_obj(geometry, material, bones=None, name=None):
+    """Same as geometry_to_obj, but links the mesh of an identical geometry imported
+    before instead of building a new one."""
+    digest = mesh_cache.get_digest(geometry, material, bones)
+    shared = mesh_cache.get(digest)
+
+    if shared is None:
+        obj = geometry_to_obj(geometry, material, bones, name)
+        mesh_cache.add(digest, obj)
+        return obj
+
+    mesh, group_names = shared
+    obj = bpy.data.objects.new(name, mesh)
+    for group_name in group_names:
+        obj.vertex_groups.new(name=group_name)
+
+    obj.sollum_type = SollumType.DRAWABLE_GEOMETRY
+    bpy.context.collection.objects.link(obj)
+    mesh_cache.add_shared(geometry)
+
+    return obj
 
 
 def geometry_to_obj_split_by_bone(model, materials, bones):
@@ -390,7 +619,8 @@ def geometry_to_obj_split_by_bone(model, materials, bones):
         vertex_map = {}
 
         vertices = geo.vertex_buffer.get_data()
-        indices = geo.index_buffer.data
+        # Copied to a list, triangles are remapped in place below
+        indices = np.asarray(geo.index_buffer.data).tolist()
 
         # Split indices into groups of 3
         triangles = [indices[i * 3:(i + 1) * 3]
@@ -466,7 +696,16 @@ def geometry_to_obj_split_by_bone(model, materials, bones):
     return bobjs
 
 
-def drawable_model_to_obj(model, materials, name, lod, bones=None, import_settings=None, armature_name=None, is_ydd=None):
+def can_join_geometries(geometries, materials):
+    """Whether geometries can be built as a single mesh. The tint graph is only set up for
+    the first material of a mesh, so geometries with other tinted materials are built as
+    separate objects and joined afterwards instead."""
+    first_material = materials[geometries[0].shader_index]
+    return not any(needs_tinted_shader_graph(materials[geometry.shader_index])
+                   for geometry in geometries if materials[geometry.shader_index] != first_material)
+
+
+def iter_drawable_model_to_obj(model, materials, name, lod, bones=None, import_settings=None, armature_name=None, is_ydd=None, join_geometries=False):
     dobj = bpy.data.objects.new(
         SOLLUMZ_UI_NAMES[SollumType.DRAWABLE_MODEL], None)
     dobj.sollum_type = SollumType.DRAWABLE_MODEL
@@ -504,15 +743,24 @@ def drawable_model_to_obj(model, materials, name, lod, bones=None, import_settin
     dobj.drawable_model_properties.flags = model.flags
 
     if import_settings.split_by_bone and model.has_skin == 1:
+        yield "Geometries"
         child_objs = geometry_to_obj_split_by_bone(model, materials, bones)
         for child_obj in child_objs:
             child_obj.parent = dobj
             for mat in materials:
                 child_obj.data.materials.append(mat)
             create_tinted_shader_graph(child_obj)
+    elif join_geometries and len(model.geometries) > 1 and can_join_geometries(model.geometries, materials):
+        yield "Geometries"
+        child_obj = joined_geometries_to_obj(
+            model.geometries, materials, bones, name)
+        child_obj.parent = dobj
+        create_tinted_shader_graph(child_obj)
     else:
+        to_obj = shared_geometry_to_obj if import_settings.share_meshes else geometry_to_obj
         for child in model.geometries:
-            child_obj = geometry_to_obj(
+            yield "Geometry"
+            child_obj = to_obj(
                 child, materials[child.shader_index], bones, name)
             child_obj.sollum_type = SollumType.DRAWABLE_GEOMETRY
             child_obj.parent = dobj
@@ -525,6 +773,10 @@ def drawable_model_to_obj(model, materials, name, lod, bones=None, import_settin
     return dobj
 
 
+def drawable_model_to_obj(*args, **kwargs):
+    return run_steps(iter_drawable_model_to_obj(*args, **kwargs))
+
+
 def create_lights(lights, parent, armature_obj=None):
     if not armature_obj:
         armature_obj = parent
@@ -537,9 +789,10 @@ def create_lights(lights, parent, armature_obj=None):
         lobj.parent = lights_parent
 
 
-def drawable_to_obj(drawable, filepath, name, bones_override=None, materials=None, import_settings=None, is_ydd=None):
+def iter_drawable_to_obj(drawable, filepath, name, bones_override=None, materials=None, import_settings=None, is_ydd=None, join_geometries=False):
 
     if not materials:
+        yield "Materials"
         materials = shadergroup_to_materials(drawable.shader_group, filepath)
 
     obj = None
@@ -563,6 +816,7 @@ def drawable_to_obj(drawable, filepath, name, bones_override=None, materials=Non
 
     bones = None
     if len(drawable.skeleton.bones) > 0:
+        yield "Skeleton"
         bones = drawable.skeleton.bones
         skeleton_to_obj(drawable.skeleton, obj)
 
@@ -573,6 +827,7 @@ def drawable_to_obj(drawable, filepath, name, bones_override=None, materials=Non
         bones = bones_override
 
     if drawable.bounds:
+        yield "Bounds"
         for bound in drawable.bounds:
             bobj = None
             if bound.type == "Composite":
@@ -584,25 +839,17 @@ def drawable_to_obj(drawable, filepath, name, bones_override=None, materials=Non
                 if bobj:
                     bobj.parent = obj
 
-    for model in drawable.drawable_models_high:
-        dobj = drawable_model_to_obj(
-            model, materials, drawable.name, LODLevel.HIGH, bones, import_settings, name, is_ydd)
-        dobj.parent = obj
-
-    for model in drawable.drawable_models_med:
-        dobj = drawable_model_to_obj(
-            model, materials, drawable.name, LODLevel.MEDIUM, bones, import_settings, name, is_ydd)
-        dobj.parent = obj
+    lods = ((LODLevel.HIGH, drawable.drawable_models_high), (LODLevel.MEDIUM, drawable.drawable_models_med),
+            (LODLevel.LOW, drawable.drawable_models_low), (LODLevel.VERYLOW, drawable.drawable_models_vlow))
 
-    for model in drawable.drawable_models_low:
-        dobj = drawable_model_to_obj(
-            model, materials, drawable.name, LODLevel.LOW, bones, import_settings, name, is_ydd)
-        dobj.parent = obj
+    for lod, models in lods:
+        if lod not in import_settings.import_lods:
+            continue
 
-    for model in drawable.drawable_models_vlow:
-        dobj = drawable_model_to_obj(
-            model, materials, drawable.name, LODLevel.VERYLOW, bones, import_settings, name, is_ydd)
-        dobj.parent = obj
+        for model in models:
+            dobj = yield from iter_drawable_model_to_obj(
+                model, materials, drawable.name, lod, bones, import_settings, name, is_ydd, join_geometries)
+            dobj.parent = obj
 
     for model in obj.children:
         if model.sollum_type != SollumType.DRAWABLE_MODEL:
@@ -616,16 +863,37 @@ def drawable_to_obj(drawable, filepath, name, bones_override=None, materials=Non
             mod.object = obj
 
     if len(drawable.lights) > 0:
+        yield "Lights"
         create_lights(drawable.lights, obj)
 
     return obj
 
 
-def import_ydr(filepath, import_settings):
-    ydr_xml = YDR.from_xml_file(filepath)
-    drawable = drawable_to_obj(ydr_xml, filepath, os.path.basename(
-        filepath.replace(YDR.file_extension, "")), None, None, import_settings)
+def drawable_to_obj(*args, **kwargs):
+    return run_steps(iter_drawable_to_obj(*args, **kwargs))
+
+
+def get_skipped_model_tags(import_settings):
+    """Tags of the drawable model lists of LOD levels that are not imported"""
+    model_tags = {LODLevel.HIGH: "DrawableModelsHigh", LODLevel.MEDIUM: "DrawableModelsMedium",
+                  LODLevel.LOW: "DrawableModelsLow", LODLevel.VERYLOW: "DrawableModelsVeryLow"}
+
+    return {tag for lod, tag in model_tags.items() if lod not in import_settings.import_lods}
+
+
+def iter_import_ydr(filepath, import_settings, ydr_xml=None):
+    if ydr_xml is None:
+        yield "Parsing"
+        with skipped_elements(Drawable, get_skipped_model_tags(import_settings)):
+            ydr_xml = YDR.from_xml_file(filepath)
+    drawable = yield from iter_drawable_to_obj(ydr_xml, filepath, os.path.basename(
+        filepath.replace(YDR.file_extension, "")), None, None, import_settings, join_geometries=import_settings.join_geometries)
     if import_settings.join_geometries:
+        yield "Joining geometries"
         for child in drawable.children:
             if child.sollum_type == SollumType.DRAWABLE_MODEL:
                 join_drawable_geometries(child)
+
+
+def import_ydr(filepath, import_settings, ydr_xml=None):
+    run_steps(iter_import_ydr(filepath, import_settings, ydr_xml))
@@ -1,10 +1,12 @@
 import bpy
 from mathutils import Matrix, Vector
-from ..tools.utils import multiW
+from ..tools.utils import multiW, run_steps
 from ..tools.meshhelper import create_uv_layer
 from ..cwxml.fragment import YFT
+from ..cwxml.drawable import Drawable
+from ..cwxml.element import skipped_elements
 from ..tools.fragmenthelper import shattermap_to_material
-from ..ydr.ydrimport import drawable_to_obj, shadergroup_to_materials, create_lights
+from ..ydr.ydrimport import iter_drawable_to_obj, shadergroup_to_materials, create_lights, get_skipped_model_tags
 from ..ybn.ybnimport import composite_to_obj
 from ..sollumz_properties import SOLLUMZ_UI_NAMES, SollumType
 
@@ -42,12 +44,13 @@ def create_vehicle_window_obj(window, name, materials):
     return wobj
 
 
-def create_lod_obj(fragment, lod, filepath, materials, import_settings):
+def iter_create_lod_obj(fragment, lod, filepath, materials, import_settings):
     has_bounds = True if lod.archetype.bounds else False
 
     if not has_bounds:
         return
 
+    yield "Physics"
     bobj = composite_to_obj(lod.archetype.bounds,
                             SOLLUMZ_UI_NAMES[SollumType.BOUND_COMPOSITE], True)
     lobj = bpy.data.objects.new(lod.tag_name, None)
@@ -152,7 +155,7 @@ def create_lod_obj(fragment, lod, filepath, materials, import_settings):
             bound.name = gobj.name.replace("_group", "_col")
 
         if len(child.drawable.drawable_models_high) > 0:
-            cdobj = drawable_to_obj(
+            cdobj = yield from iter_drawable_to_obj(
                 child.drawable, filepath, f"Drawable{idx}", None, materials, import_settings)
             cdobj.matrix_basis = child.drawable.matrix
             cdobj.parent = cobj
@@ -172,7 +175,7 @@ def create_lod_obj(fragment, lod, filepath, materials, import_settings):
     return lobj
 
 
-def fragment_to_obj(fragment, filepath, import_settings=None):
+def iter_fragment_to_obj(fragment, filepath, import_settings=None):
     fobj = bpy.data.objects.new(fragment.name, None)
     fobj.empty_display_size = 0
     fobj.sollum_type = SollumType.FRAGMENT
@@ -189,28 +192,30 @@ def fragment_to_obj(fragment, filepath, import_settings=None):
 
     materials = None
     if fragment.drawable:
+        yield "Materials"
         materials = shadergroup_to_materials(
             fragment.drawable.shader_group, filepath)
-        dobj = drawable_to_obj(
+        dobj = yield from iter_drawable_to_obj(
             fragment.drawable, filepath, fragment.drawable.name, None, materials, import_settings)
         dobj.matrix_basis = fragment.drawable.matrix
         dobj.parent = fobj
 
         if len(fragment.lights) > 0:
+            yield "Lights"
             create_lights(fragment.lights, parent=fobj, armature_obj=dobj)
 
     if len(fragment.physics.lod1.groups) > 0:
-        lobj = create_lod_obj(fragment, fragment.physics.lod1,
+        lobj = yield from iter_create_lod_obj(fragment, fragment.physics.lod1,
                               filepath, materials, import_settings)
         lobj.lod_properties.type = 1
         lobj.parent = fobj
     if len(fragment.physics.lod2.groups) > 0:
-        lobj = create_lod_obj(fragment, fragment.physics.lod2,
+        lobj = yield from iter_create_lod_obj(fragment, fragment.physics.lod2,
                               filepath, materials, import_settings)
         lobj.lod_properties.type = 2
         lobj.parent = fobj
     if len(fragment.physics.lod3.groups) > 0:
-        lobj = create_lod_obj(fragment, fragment.physics.lod3,
+        lobj = yield from iter_create_lod_obj(fragment, fragment.physics.lod3,
                               filepath, materials, import_settings)
         lobj.lod_properties.type = 3
         lobj.parent = fobj
@@ -238,12 +243,23 @@ def fragment_to_obj(fragment, filepath, import_settings=None):
     return fobj
 
 
+def fragment_to_obj(fragment, filepath, import_settings=None):
+    return run_steps(iter_fragment_to_obj(fragment, filepath, import_settings))
+
+
 def get_fragment_drawable(fragment):
     for child in fragment.children:
         if child.sollum_type == SollumType.DRAWABLE:
             return child
 
 
-def import_yft(filepath, import_settings):
-    yft_xml = YFT.from_xml_file(filepath)
-    fragment_to_obj(yft_xml, filepath, import_settings)
+def iter_import_yft(filepath, import_settings, yft_xml=None):
+    if yft_xml is None:
+        yield "Parsing"
+        with skipped_elements(Drawable, get_skipped_model_tags(import_settings)):
+            yft_xml = YFT.from_xml_file(filepath)
+    yield from iter_fragment_to_obj(yft_xml, filepath, import_settings)
+
+
+def import_yft(filepath, import_settings, yft_xml=None):
+    run_steps(iter_import_yft(filepath, import_settings, yft_xml))